@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+import pandas as pd
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Analyses share loaded dataframes through ReportContext, so derived
+        # frames must never write back into them.
+        pd.set_option("mode.copy_on_write", True)
@@ -19,6 +19,10 @@ class ReportGenerationConsumer(AsyncJsonWebsocketConsumer):
                 "type": "analysis_complete",
                 "progress": event["progress"],
                 "total": event["total"],
+                "result_id": event["result_id"],
+                "analysis_name": event["analysis_name"],
+                "position": event["position"],
+                "url": event["url"],
             }
         )
 
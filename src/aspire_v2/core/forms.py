@@ -1,6 +1,27 @@
 from django import forms
-from .models import RetrievalTask, RetrievalRun
+from django.core.files.uploadedfile import UploadedFile
+from django.db import models
+from .models import RetrievalTask, RetrievalRun, content_addressed_name
 from .lib.reports import all_reports
+from .lib.trec import read_qrels, read_run
+
+import hashlib
+
+
+def _content_hash(file: UploadedFile) -> str:
+    # Set by the upload handlers; files created otherwise are hashed here.
+    if not hasattr(file, "sha256"):
+        file.sha256 = hashlib.file_digest(file, "sha256").hexdigest()
+        file.seek(0)
+    return file.sha256
+
+
+def _deduplicated(
+    file: UploadedFile, model_field: models.FileField, directory: str
+) -> UploadedFile | str:
+    """The upload, or the name of an already stored file with its content."""
+    name = content_addressed_name(directory, _content_hash(file))
+    return name if model_field.storage.exists(name) else file
 
 
 class RetrievalTaskUploadForm(forms.ModelForm):
@@ -8,6 +29,17 @@ class RetrievalTaskUploadForm(forms.ModelForm):
         model = RetrievalTask
         fields = ("title", "description", "qrels", "topics")
 
+    def clean_qrels(self):
+        qrels = self.cleaned_data["qrels"]
+        try:
+            self.qrels_dataframe = read_qrels(qrels)
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+        finally:
+            qrels.seek(0)
+        self.instance.qrels_hash = _content_hash(qrels)
+        return _deduplicated(qrels, RetrievalTask._meta.get_field("qrels"), "qrels")
+
 
 class RetrievalRunUploadForm(forms.ModelForm):
     class Meta:
@@ -21,6 +53,17 @@ class RetrievalRunUploadForm(forms.ModelForm):
         self.fields["ir_task"].label = "Retrieval task"
         self.fields["ir_task"].choices = [(task.id, task.title) for task in tasks]
 
+    def clean_file(self):
+        file = self.cleaned_data["file"]
+        try:
+            self.dataframe = read_run(file)
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+        finally:
+            file.seek(0)
+        self.instance.file_hash = _content_hash(file)
+        return _deduplicated(file, RetrievalRun._meta.get_field("file"), "runs")
+
 
 class NewReportGeneralForm(forms.Form):
     title = forms.CharField(label="Title", max_length=100)
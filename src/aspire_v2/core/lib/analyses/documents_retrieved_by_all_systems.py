@@ -1,8 +1,8 @@
 from ..interfaces import Analysis, AnalysisForm, Result
-from ...models import RetrievalTask, RetrievalRun
+from ..report_context import ReportContext
 from ..results import CompositeResult, ValueResult
 import numpy as np
-from collections import Counter
+import pandas as pd
 
 from django import forms
 
@@ -24,52 +24,49 @@ class DocumentsRetrievedByAllSystemsForm(AnalysisForm):
 class DocumentsRetrievedByAllSystems(Analysis):
     name = "Documents Retrieved By All Systems"
     form_class = DocumentsRetrievedByAllSystemsForm
+    version = 2
 
-    def execute(
-        self,
-        retrieval_task: RetrievalTask,
-        retrieval_runs: list[RetrievalRun],
-        **parameters: dict,
-    ) -> Result:
+    def execute(self, context: ReportContext, **parameters: dict) -> Result:
         cutoff = int(parameters["cutoff"])
         sample_size = int(parameters["sample_size"])
 
-        all_queries = set()
-        all_docs = set()
-        for retrieval_run in retrieval_runs:
-            df = retrieval_run.dataframe
-            all_queries.update(df["query_id"])
-            all_docs.update(df["doc_id"])
-
-        query_map = {q: q for q in all_queries}
-        doc_map = {d: i for i, d in enumerate(all_docs)}
-
-        n_queries = len(all_queries)
-        n_docs = len(all_docs)
-        n_runs = len(retrieval_runs)
-
-        data = np.zeros((n_runs, n_queries, n_docs), dtype=bool)
-
-        for i, retrieval_run in enumerate(retrieval_runs):
-            for _, row in retrieval_run.dataframe.iterrows():
-                if row["rank"] <= cutoff:
-                    q_idx = list(query_map.keys()).index(row["query_id"])
-                    d_idx = doc_map[row["doc_id"]]
-                    data[i, q_idx, d_idx] = True
-
-        docs_retrieved_by_all = data.all(axis=0)
-
-        retrieved_docs = []
-        queries_with_retrieved_docs = set()
-        for q_idx, d_idx in zip(*np.where(docs_retrieved_by_all)):
-            query_id = list(query_map.keys())[q_idx]
-            doc_id = list(doc_map.keys())[list(doc_map.values()).index(d_idx)]
-            retrieved_docs.append(doc_id)
-            queries_with_retrieved_docs.add(query_id)
+        retrieval_runs = context.retrieval_runs
+
+        top_k = [
+            context.run(retrieval_run).loc[
+                lambda df: df["rank"] <= cutoff, ["query_code", "doc_code"]
+            ]
+            for retrieval_run in retrieval_runs
+        ]
+        pairs = pd.concat(top_k, ignore_index=True)
+
+        # Combine the query and document codes of every pair into a single
+        # integer so that each run becomes a sorted array of pair codes.
+        vocabulary = context.vocabulary
+        query_ids, doc_ids = vocabulary.query_ids, vocabulary.doc_ids
+        pair_codes = (
+            pairs["query_code"].to_numpy(np.int64) * len(doc_ids)
+            + pairs["doc_code"].to_numpy()
+        )
 
-        doc_counts = Counter(retrieved_docs)
+        run_boundaries = np.cumsum([len(df) for df in top_k])[:-1]
+        run_pair_codes = [
+            np.unique(codes) for codes in np.split(pair_codes, run_boundaries)
+        ]
+        unique_pair_codes, run_counts = np.unique(
+            np.concatenate(run_pair_codes), return_counts=True
+        )
+        common_pair_codes = unique_pair_codes[run_counts == len(retrieval_runs)]
+
+        queries_with_retrieved_docs = set(query_ids[common_pair_codes // len(doc_ids)])
+        # Like Counter.most_common, ties keep the order the documents were seen in
+        doc_counts = (
+            pd.Series(doc_ids[common_pair_codes % len(doc_ids)])
+            .value_counts(sort=False)
+            .sort_values(ascending=False, kind="stable")
+        )
 
-        most_frequent_docs = [doc for doc, _ in doc_counts.most_common(sample_size)]
+        most_frequent_docs = list(doc_counts.index[:sample_size])
 
         return CompositeResult(
             {
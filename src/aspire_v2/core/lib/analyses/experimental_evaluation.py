@@ -1,7 +1,7 @@
 from ..interfaces import Analysis, Result, AnalysisForm, Measure
 from ..results import TableResult, CompositeResult
-from ...models import RetrievalRun, RetrievalTask
-from ..utils.measure_calculation import get_per_query_measure
+from ..report_context import ReportContext
+from ..utils.measure_calculation import get_per_query_measures
 from ..measures import (
     AveragePrecision,
     PercentageOfRelevantDocsInCutoff,
@@ -56,7 +56,7 @@ class ExperimentalEvaluationForm(AnalysisForm):
         )
 
         if retrieval_task and retrieval_runs:
-            max_relevance = retrieval_task.qrels_dataframe["relevance"].max()
+            max_relevance = retrieval_task.max_relevance
             self.fields["relevance_threshold"].max_value = max_relevance
             self.fields["relevance_threshold"].widget = forms.NumberInput(
                 attrs={
@@ -79,15 +79,11 @@ class ExperimentalEvaluation(Analysis):
     name = "Experimental Evaluation"
     form_class = ExperimentalEvaluationForm
 
-    def execute(
-        self,
-        retrieval_task: RetrievalTask,
-        retrieval_runs: list[RetrievalRun],
-        **parameters: dict,
-    ) -> Result:
+    def execute(self, context: ReportContext, **parameters: dict) -> Result:
         relevance_threshold = parameters["relevance_threshold"]
         correction_method = parameters["correction_method"]
         correction_value = float(parameters["correction_value"])
+        retrieval_runs = context.retrieval_runs
 
         measures: list[Measure] = [
             AveragePrecision(rel=relevance_threshold, cutoff=100, judged_only=False),
@@ -99,22 +95,17 @@ class ExperimentalEvaluation(Analysis):
             MeanReciprocalRank(rel=relevance_threshold, cutoff=100, judged_only=False),
         ]
 
-        measure_values = {
-            retrieval_run.title: {
-                measure.measure_name: get_per_query_measure(retrieval_run, measure)
-                for measure in measures
-            }
-            for retrieval_run in retrieval_runs
-        }
+        measure_values = get_per_query_measures(retrieval_runs, measures)
 
-        measure_values_table = pd.DataFrame(
-            index=[measure.measure_name for measure in measures]
+        measure_values_table = (
+            measure_values.groupby(level="run_id").mean().T.rename_axis(None)
         )
-        for title, values in measure_values.items():
-            measure_values_table[title] = [
-                np.mean(list(per_query_values.values()))
-                for measure_name, per_query_values in values.items()
-            ]
+        measure_values_table = measure_values_table[
+            [retrieval_run.id for retrieval_run in retrieval_runs]
+        ]
+        measure_values_table.columns = [
+            retrieval_run.title for retrieval_run in retrieval_runs
+        ]
 
         baseline_run = list(
             filter(
@@ -134,32 +125,23 @@ class ExperimentalEvaluation(Analysis):
         corrected_p_values_table = pd.DataFrame(
             index=[measure.measure_name for measure in measures]
         )
+        baseline_values = measure_values.loc[baseline_run.id]
         for run in runs_to_compare:
+            run_values = measure_values.loc[run.id]
             p_values = []
             for measure in measures:
-                baseline_query_ids = measure_values[baseline_run.title][
-                    measure.measure_name
-                ].keys()
-                baseline_values = measure_values[baseline_run.title][
-                    measure.measure_name
-                ].values()
-
-                run_query_ids = measure_values[run.title][measure.measure_name].keys()
-                run_values = measure_values[run.title][measure.measure_name].values()
-
-                common_query_ids = run_query_ids & baseline_query_ids
-                baseline_values = [
-                    v
-                    for v, qid in zip(baseline_values, baseline_query_ids)
-                    if qid in common_query_ids
-                ]
-                run_values = [
-                    v
-                    for v, qid in zip(run_values, run_query_ids)
-                    if qid in common_query_ids
-                ]
-
-                result = scipy.stats.ttest_rel(baseline_values, run_values)
+                common_values = pd.concat(
+                    [
+                        baseline_values[measure.measure_name],
+                        run_values[measure.measure_name],
+                    ],
+                    axis=1,
+                    join="inner",
+                ).dropna()
+
+                result = scipy.stats.ttest_rel(
+                    common_values.iloc[:, 0], common_values.iloc[:, 1]
+                )
                 p_values.append(None if np.isnan(result.pvalue) else result.pvalue)
             p_values_table[run.title] = p_values
             corrected_p_values_table[run.title] = sm.stats.multipletests(
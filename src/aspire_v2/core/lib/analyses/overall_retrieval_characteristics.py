@@ -1,8 +1,7 @@
 from ..interfaces import Analysis, Result, AnalysisForm
 from ..results import TableResult
-from ...models import RetrievalRun, RetrievalTask
-from ..utils.measure_calculation import get_aggregate_measure
-import pandas as pd
+from ..report_context import ReportContext
+from ..utils.measure_calculation import get_aggregate_measures
 from ..measures import NumberOfQueries, NumberOfRelevantDocuments, NumberOfResults
 
 from django import forms
@@ -22,7 +21,7 @@ class OverallRetrievalCharacteristicsForm(AnalysisForm):
         )
 
         if retrieval_task and retrieval_runs:
-            max_relevance = retrieval_task.qrels_dataframe["relevance"].max()
+            max_relevance = retrieval_task.max_relevance
             self.fields["relevance_threshold"].max_value = max_relevance
             self.fields["relevance_threshold"].initial = max_relevance
             self.fields["relevance_threshold"].widget = forms.NumberInput(
@@ -40,22 +39,16 @@ class OverallRetrievalCharacteristics(Analysis):
     name = "Overall Retrieval Characteristics"
     form_class = OverallRetrievalCharacteristicsForm
 
-    def execute(
-        self,
-        retrieval_task: RetrievalTask,
-        retrieval_runs: list[RetrievalRun],
-        **parameters: dict,
-    ) -> Result:
+    def execute(self, context: ReportContext, **parameters: dict) -> Result:
         measures = [
             NumberOfQueries(),
             NumberOfRelevantDocuments(rel=1),
             NumberOfResults(rel=1),
         ]
 
-        result = pd.DataFrame(index=[measure.measure_name for measure in measures])
-        for retrieval_run in retrieval_runs:
-            result[retrieval_run.title] = [
-                get_aggregate_measure(retrieval_run, measure) for measure in measures
-            ]
+        result = get_aggregate_measures(context.retrieval_runs, measures)
+        result.columns = [
+            retrieval_run.title for retrieval_run in context.retrieval_runs
+        ]
 
         return TableResult(result)
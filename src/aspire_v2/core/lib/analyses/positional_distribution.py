@@ -1,11 +1,10 @@
 from ..interfaces import Analysis, Result, AnalysisForm
 from ..results import PlotResult, CompositeResult
-from ...models import RetrievalRun, RetrievalTask
+from ..report_context import ReportContext
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
 
-from collections import defaultdict
-
 
 class PositionalDistributionForm(AnalysisForm):
     prefix = "positional_distribution"
@@ -14,114 +13,84 @@ class PositionalDistributionForm(AnalysisForm):
 class PositionalDistribution(Analysis):
     name = "Positional Distribution of Relevant and Unjudged Retrieved Documents"
     form_class = PositionalDistributionForm
+    version = 2
+
+    def execute(self, context: ReportContext, **parameters: dict) -> Result:
+        relevance_labels = context.qrels["relevance"].unique()
 
-    def execute(
-        self,
-        retrieval_task: RetrievalTask,
-        retrieval_runs: list[RetrievalRun],
-        **parameters: dict,
-    ) -> Result:
         results = {}
-        for retrieval_run in retrieval_runs:
+        for retrieval_run in context.retrieval_runs:
             relevant_and_unjedged = self._get_relevant_and_unjudged(
-                retrieval_task.qrels_dataframe, retrieval_run.dataframe
+                context.judged_run(retrieval_run), relevance_labels
             )
             results[retrieval_run.title] = PlotResult(
                 self._plot_dist_of_retrieved_docs(relevant_and_unjedged)
             )
         return CompositeResult(results)
 
-    def _get_relevant_and_unjudged(self, qrel: pd.DataFrame, res: pd.DataFrame) -> dict:
+    def _get_relevant_and_unjudged(
+        self, merged_df: pd.DataFrame, relevance_labels: np.ndarray
+    ) -> pd.DataFrame:
         """
-        Merge 'res' and 'qrel' DataFrames on 'query_id' and 'doc_id'.
-        For each unique 'query_id', determine:
-        - The first rank positions for relevance thresholds (0, 1, 2).
-        - The rank position where 'relevance' is NaN (first_unjudged).
-        Returns a dictionary where keys are 'query_id' and values are dictionaries
-        containing these rank positions.
+        For each query of a run joined with its qrels, determine the first
+        rank position (by descending score) of a document with each relevance
+        label, and of an unjudged document. Queries without such a document
+        get their number of retrieved documents instead.
+        Returns a frame with a row per query and a column per label.
         """
-        merged_df = pd.merge(res, qrel, on=["query_id", "doc_id"], how="left")
-        ranking_per_relevance = {}
-        relevance_thresholds = qrel["relevance"].unique()
-
-        for query_id, group in merged_df.groupby("query_id"):
-            group_sorted = group.sort_values(by="score", ascending=False)
-            query_result = {}
-
-            for relevance_val in relevance_thresholds:
-                relevant_rows = group_sorted[group_sorted["relevance"] == relevance_val]
-                first_rank = (
-                    relevant_rows["rank"].iloc[0]
-                    if not relevant_rows.empty
-                    else f"{len(group_sorted)}"
-                )
-
-                if not relevance_val == 0:
-                    query_result[f"Relevance_Label_{relevance_val}"] = first_rank
-                else:
-                    query_result["Irrelevant_Document"] = first_rank
-
-            nan_relevance_rows = group_sorted[group_sorted["relevance"].isna()]
-            first_rank_nan_relevance = (
-                nan_relevance_rows["rank"].iloc[0]
-                if not nan_relevance_rows.empty
-                else f"{len(group_sorted)}"
-            )
-
-            query_result["Unjudged_Document"] = first_rank_nan_relevance
-            ranking_per_relevance[query_id] = query_result
-
-        return ranking_per_relevance
-
-    def _plot_dist_of_retrieved_docs(self, relevance_ret_pos: dict) -> None:
-        bucket_ranges = {
-            "1": (1, 1),
-            "2-10": (2, 10),
-            "11-20": (11, 20),
-            "21-30": (21, 30),
-            "31-40": (31, 40),
-            "41-50": (41, 50),
-            "51-60": (51, 60),
-            "61-70": (61, 70),
-            "71-80": (71, 80),
-            "81-90": (81, 90),
-            "91-100": (91, 100),
-            "101-200": (101, 200),
-            "200+": (201, 999),  # Handle values greater than 200
-        }
-
-        thresholds = set(
-            key for values in relevance_ret_pos.values() for key in values.keys()
+        labels = sorted(relevance_labels)
+        ordered = merged_df.sort_values(
+            ["query_code", "score"], ascending=[True, False], kind="stable"
+        )
+        first_ranks = (
+            ordered.groupby(["query_code", "relevance"], dropna=False, sort=False)[
+                "rank"
+            ]
+            .first()
+            .unstack()
+            .reindex(columns=[*labels, np.nan])
+        )
+        docs_per_query = ordered.groupby("query_code").size()
+
+        return pd.DataFrame(
+            np.where(
+                first_ranks.isna(),
+                docs_per_query.loc[first_ranks.index].to_numpy()[:, None],
+                first_ranks,
+            ).astype(int),
+            index=first_ranks.index,
+            columns=[
+                "Irrelevant_Document" if label == 0 else f"Relevance_Label_{label}"
+                for label in labels
+            ]
+            + ["Unjudged_Document"],
         )
-        buckets = {
-            threshold: {bucket: 0 for bucket in bucket_ranges.keys()}
-            for threshold in thresholds
-        }
-
-        for query_id, values in relevance_ret_pos.items():
-            for threshold, value in values.items():
-                value = int(value)
-                for bucket, (start, end) in bucket_ranges.items():
-                    if start <= value <= end:
-                        buckets[threshold][bucket] += 1
-                        break  # Break once the bucket is found
-
-        all_data = []
-        for metric, bucket_counts in buckets.items():
-            for bucket, count in bucket_counts.items():
-                all_data.append((metric, bucket, count))
-
-        all_data.sort(key=lambda x: list(bucket_ranges.keys()).index(x[1]))
 
-        sorted_buckets = defaultdict(lambda: defaultdict(int))
-        for metric, bucket, count in all_data:
-            sorted_buckets[metric][bucket] = count
+    def _plot_dist_of_retrieved_docs(self, first_ranks: pd.DataFrame) -> go.Figure:
+        # Bucket i holds the ranks in [edges[i - 1], edges[i]); ranks outside
+        # [1, 999] are not counted.
+        x_labels = [
+            "1",
+            "2-10",
+            "11-20",
+            "21-30",
+            "31-40",
+            "41-50",
+            "51-60",
+            "61-70",
+            "71-80",
+            "81-90",
+            "91-100",
+            "101-200",
+            "200+",
+        ]
+        edges = [1, 2, 11, 21, 31, 41, 51, 61, 71, 81, 91, 101, 201, 1000]
+        buckets = np.digitize(first_ranks.to_numpy(), edges)
 
         fig = go.Figure()
 
-        x_labels = list(bucket_ranges.keys())
         x_indices = list(range(len(x_labels)))
-        num_metrics = len(buckets)
+        num_metrics = len(first_ranks.columns)
         colors = [
             "skyblue",
             "lightgreen",
@@ -130,11 +99,12 @@ class PositionalDistribution(Analysis):
         ]
         width = 0.2
 
-        for index, (metric, bucket_counts) in enumerate(sorted_buckets.items()):
+        for index, metric in enumerate(first_ranks.columns):
+            bucket_counts = np.bincount(buckets[:, index], minlength=len(edges) + 1)
             fig.add_trace(
                 go.Bar(
                     x=[i + (index - num_metrics / 2) * width for i in x_indices],
-                    y=[bucket_counts[bucket] for bucket in x_labels],
+                    y=bucket_counts[1 : len(edges)],
                     width=width,
                     name=metric,
                     marker_color=colors[index % len(colors)],
@@ -1,8 +1,8 @@
 from ..interfaces import Analysis, Result, AnalysisForm
 from ..results import PlotResult
-from ...models import RetrievalRun, RetrievalTask
+from ..report_context import ReportContext
 import plotly.graph_objects as go
-from ..utils.measure_calculation import get_aggregate_measure
+from ..utils.measure_calculation import get_aggregate_measures
 from ..measures import InterpolatedPrecisionAtRecallCutoff
 
 from django import forms
@@ -22,7 +22,7 @@ class PrecisionRecallCurveForm(AnalysisForm):
         )
 
         if retrieval_task and retrieval_runs:
-            max_relevance = retrieval_task.qrels_dataframe["relevance"].max()
+            max_relevance = retrieval_task.max_relevance
             self.fields["relevance_threshold"].max_value = max_relevance
             self.fields["relevance_threshold"].initial = max_relevance
             self.fields["relevance_threshold"].widget = forms.NumberInput(
@@ -40,28 +40,27 @@ class PrecisionRecallCurve(Analysis):
     name = "Precision/Recall Curve"
     form_class = PrecisionRecallCurveForm
 
-    def execute(
-        self,
-        retrieval_task: RetrievalTask,
-        retrieval_runs: list[RetrievalRun],
-        **parameters: dict,
-    ) -> Result:
+    def execute(self, context: ReportContext, **parameters: dict) -> Result:
         relevance_threshold = parameters["relevance_threshold"]
         x = [i / 10.0 for i in range(11)]
 
+        measures = [
+            InterpolatedPrecisionAtRecallCutoff(
+                rel=relevance_threshold, recall=recall, judged_only=True
+            )
+            for recall in x
+        ]
+        values = get_aggregate_measures(context.retrieval_runs, measures)
+
         fig = go.Figure()
-        for retrieval_run in retrieval_runs:
-            y = [
-                get_aggregate_measure(
-                    retrieval_run,
-                    InterpolatedPrecisionAtRecallCutoff(
-                        rel=relevance_threshold, recall=recall, judged_only=True
-                    ),
-                )
-                for recall in x
-            ]
+        for retrieval_run in context.retrieval_runs:
             fig.add_trace(
-                go.Scatter(x=x, y=y, mode="lines+markers", name=retrieval_run.title)
+                go.Scatter(
+                    x=x,
+                    y=values[retrieval_run.id].tolist(),
+                    mode="lines+markers",
+                    name=retrieval_run.title,
+                )
             )
 
         fig.update_layout(
@@ -1,5 +1,5 @@
 from ..interfaces import Analysis, AnalysisForm, Result
-from ...models import RetrievalTask, RetrievalRun
+from ..report_context import ReportContext
 from ..results import PlotResult
 import pandas as pd
 import plotly.graph_objects as go
@@ -19,53 +19,46 @@ class RelevanceJudgmentsForMultipleQueriesForm(AnalysisForm):
 class RelevanceJudgmentsForMultipleQueries(Analysis):
     name = "Relevance Judgments for Multiple Queries"
     form_class = RelevanceJudgmentsForMultipleQueriesForm
+    version = 2
 
-    def execute(
-        self,
-        retrieval_task: RetrievalTask,
-        retrieval_runs: list[RetrievalRun],
-        **parameters: dict,
-    ) -> Result:
+    def execute(self, context: ReportContext, **parameters: dict) -> Result:
         number_of_documents_to_display = parameters["number_of_documents_to_display"]
 
-        qrels = retrieval_task.qrels_dataframe
-        multi_query_docs = self._get_multi_query_docs(qrels).head(
-            number_of_documents_to_display
+        doc_codes, judgments = self._get_multi_query_judgments(
+            context.qrels, number_of_documents_to_display
         )
+        vocabulary = context.vocabulary
 
-        fig = go.Figure()
-
-        # Get unique relevance labels
-        all_relevance = [
-            rel
-            for doc_rel in multi_query_docs["relevance_judgments"]
-            for rel in doc_rel.values()
+        # Label x document tables, documents in display order
+        judgments["query_id"] = vocabulary.query_ids.take(judgments["query_code"])
+        by_label = judgments.sort_values("query_id").groupby(["relevance", "doc_code"])[
+            "query_id"
         ]
-        unique_relevance = sorted(set(all_relevance))
+        counts = (
+            by_label.size()
+            .unstack(fill_value=0)
+            .reindex(columns=doc_codes, fill_value=0)
+        )
+        queries = (
+            by_label.agg(", ".join)
+            .unstack(fill_value="")
+            .reindex(columns=doc_codes, fill_value="")
+        )
+
+        fig = go.Figure()
 
         # Generate a color scale
         color_scale = px.colors.qualitative.Plotly
-        relevance_colors = {
-            rel: color_scale[i % len(color_scale)]
-            for i, rel in enumerate(unique_relevance)
-        }
-
-        for rel_label in unique_relevance:
-            counts = [
-                sum(1 for rel in doc_rel.values() if rel == rel_label)
-                for doc_rel in multi_query_docs["relevance_judgments"]
-            ]
+        doc_ids = vocabulary.doc_ids.take(doc_codes)
 
+        for i, rel_label in enumerate(counts.index):
             fig.add_trace(
                 go.Bar(
-                    x=multi_query_docs["doc_id"],
-                    y=counts,
+                    x=doc_ids,
+                    y=counts.loc[rel_label].to_numpy(),
                     name=f"Relevance {rel_label}",
-                    marker_color=relevance_colors[rel_label],
-                    hovertext=[
-                        f"Queries: {', '.join([q for q, r in doc_rel.items() if r == rel_label])}"
-                        for doc_rel in multi_query_docs["relevance_judgments"]
-                    ],
+                    marker_color=color_scale[i % len(color_scale)],
+                    hovertext=("Queries: " + queries.loc[rel_label]).to_numpy(),
                     hoverinfo="text+y",
                     hoverlabel=dict(bgcolor="white", font=dict(color="gray")),
                 )
@@ -86,18 +79,25 @@ class RelevanceJudgmentsForMultipleQueries(Analysis):
 
         return PlotResult(fig)
 
-    def _get_multi_query_docs(self, df: pd.DataFrame) -> pd.DataFrame:
-        doc_query_count = df.groupby("doc_id")["query_id"].nunique()
-        multi_query_docs = doc_query_count[doc_query_count > 1]
-        multi_query_docs = multi_query_docs.sort_values(ascending=False)
-
-        result = pd.DataFrame(
-            {"doc_id": multi_query_docs.index, "query_count": multi_query_docs.values}
+    def _get_multi_query_judgments(
+        self, qrels: pd.DataFrame, number_of_documents: int
+    ) -> tuple[pd.Index, pd.DataFrame]:
+        """
+        Find the documents judged for the most queries, at most
+        number_of_documents of them, among those judged for more than one
+        query. Returns their codes, most judged first, and their judgments;
+        the first judgment of each (document, query) pair is kept.
+        """
+        pairs = qrels[["doc_code", "query_code", "relevance"]].drop_duplicates(
+            ["doc_code", "query_code"]
         )
-
-        relevance_info = df.groupby("doc_id").apply(
-            lambda x: x.groupby("query_id")["relevance"].first().to_dict()
+        query_counts = pairs["doc_code"].value_counts(sort=False)
+        doc_codes = (
+            query_counts[query_counts > 1]
+            .sort_index()
+            .sort_values(ascending=False, kind="stable")
+            .head(number_of_documents)
+            .index
         )
-        result["relevance_judgments"] = result["doc_id"].map(relevance_info)
 
-        return result
+        return doc_codes, pairs[pairs["doc_code"].isin(doc_codes)]
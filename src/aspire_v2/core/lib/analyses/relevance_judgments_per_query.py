@@ -1,8 +1,7 @@
 from ..interfaces import Analysis, AnalysisForm, Result
-from ...models import RetrievalTask, RetrievalRun
+from ..report_context import ReportContext
 from ..results import CompositeResult, TableResult, PlotResult
 from ..utils.common import get_query_rel_judgements, sort_query_ids
-import numpy as np
 import pandas as pd
 from plotly.subplots import make_subplots
 import plotly.graph_objects as go
@@ -17,14 +16,9 @@ class RelevanceJudgmentsPerQuery(Analysis):
     name = "Relevance Judgments per Query"
     form_class = RelevanceJudgmentsPerQueryForm
 
-    def execute(
-        self,
-        retrieval_task: RetrievalTask,
-        retrieval_runs: list[RetrievalRun],
-        **parameters: dict,
-    ) -> Result:
-        qrel_df = retrieval_task.qrels_dataframe
-        relevance_counts, results = get_query_rel_judgements(qrel_df)
+    def execute(self, context: ReportContext, **parameters: dict) -> Result:
+        qrel_df = context.qrels
+        relevance_counts = get_query_rel_judgements(qrel_df)
 
         sorted_query_ids = sort_query_ids(relevance_counts.index)
         relevance_counts = relevance_counts.loc[sorted_query_ids]
@@ -97,83 +91,67 @@ class RelevanceJudgmentsPerQuery(Analysis):
             tickangle=45,
         )
 
-        analysis_results = {}
-        queries = sort_query_ids(list(results.keys()))
-        relevance_labels = ["Relevance_Label_0"] + list(
-            results[queries[0]]["relevant"].keys()
+        # Query x label count matrix, queries in sorted order
+        label_counts = relevance_counts.rename(
+            columns={"Irrelevant": "Relevance_Label_0"}
         )
+        relevance_labels = ["Relevance_Label_0"] + [
+            column for column in label_counts.columns if column != "Relevance_Label_0"
+        ]
+        label_counts = label_counts[relevance_labels]
 
-        sorted_queries = {}
-        for label in relevance_labels:
-            label_judgements = self._get_label_judgements(results, queries, label)
-            sorted_queries[label] = sorted(
-                label_judgements.items(), key=lambda x: (-x[1], queries.index(x[0]))
+        analysis_results = {}
+        analysis_results["sorted_queries"] = {
+            label: list(
+                label_counts[label].sort_values(ascending=False, kind="stable").items()
             )
-        analysis_results["sorted_queries"] = sorted_queries
-
-        for label in relevance_labels:
-            values = [
-                self._get_label_judgements(results, queries, label)[q] for q in queries
-            ]
-            analysis_results[f"{label}_stats"] = {
-                "mean": np.mean(values),
-                "median": np.median(values),
-                "std": np.std(values),
-                "min": min(values),
-                "max": max(values),
-            }
+            for label in relevance_labels
+        }
 
-        analysis_results["query_difficulty"] = {}
-        for label in relevance_labels:
-            values = {
-                q: self._get_label_judgements(results, queries, label)[q]
-                for q in queries
+        stats = pd.DataFrame(
+            {
+                "mean": label_counts.mean(),
+                "median": label_counts.median(),
+                "std": label_counts.std(ddof=0),
+                "min": label_counts.min(),
+                "max": label_counts.max(),
             }
-            difficulty_classification = self._classify_queries(values)
-            analysis_results["query_difficulty"][label] = difficulty_classification
+        )
+        for label, label_stats in stats.to_dict("index").items():
+            analysis_results[f"{label}_stats"] = label_stats
 
-        analysis_results["overall_stats"] = {}
-        for label in relevance_labels:
-            total = sum(self._get_label_judgements(results, queries, label).values())
-            analysis_results["overall_stats"][label] = total
+        analysis_results["query_difficulty"] = {
+            label: self._classify_queries(label_counts[label])
+            for label in relevance_labels
+        }
 
-        total_judgements = sum(analysis_results["overall_stats"].values())
-        for label in relevance_labels:
-            analysis_results["overall_stats"][f"{label}_percentage"] = (
-                analysis_results["overall_stats"][label] / total_judgements
-            ) * 100
+        totals = label_counts.sum()
+        percentages = totals / totals.sum() * 100
+        analysis_results["overall_stats"] = {
+            **totals.to_dict(),
+            **percentages.add_suffix("_percentage").to_dict(),
+        }
 
-        label_comparison = self._compare_relevance_labels(
-            results, queries, relevance_labels
-        )
+        label_comparison = self._compare_relevance_labels(relevance_counts)
 
         analysis_results_df = pd.DataFrame(
+            {
+                label.replace("_", " "): [
+                    ", ".join(stats["easy_queries"][:5]),
+                    ", ".join(stats["hard_queries"][:5]),
+                    stats["min_query"],
+                    stats["max_query"],
+                ]
+                for label, stats in label_comparison.items()
+            },
             index=[
                 "Easy Queries (top 5)",
                 "Hard Queries (top 5)",
                 "Min Query",
                 "Max Query",
-            ]
+            ],
         )
 
-        for label, stats in label_comparison.items():
-            top5_easy = ", ".join(
-                stats["easy_queries"][:5]
-                if len(stats["easy_queries"]) > 5
-                else stats["easy_queries"]
-            )
-            top5_hard = ", ".join(
-                stats["hard_queries"][:5]
-                if len(stats["hard_queries"]) > 5
-                else stats["hard_queries"]
-            )
-            analysis_results_df[label.replace("_", " ")] = [
-                top5_easy,
-                top5_hard,
-                stats["min_query"],
-                stats["max_query"],
-            ]
-
         return CompositeResult(
             {
                 "Query Relevance Judgments Plot": PlotResult(fig),
@@ -181,108 +159,38 @@ class RelevanceJudgmentsPerQuery(Analysis):
             }
         )
 
-    def _get_label_judgements(self, data, queries, label):
-        if label == "Relevance_Label_0":
-            return {q: data[q]["irrelevant"] for q in queries}
-        else:
-            return {q: data[q]["relevant"][label] for q in queries}
-
-    def _classify_queries(self, values, n_hard=5, n_easy=5):
-        sorted_queries = sorted(values.items(), key=lambda x: x[1])
-        hard_queries = [q for q, _ in sorted_queries[:n_hard]]
-        easy_queries = [q for q, _ in sorted_queries[-n_easy:]]
-        values_list = list(values.values())
+    def _classify_queries(self, values: pd.Series, n_hard=5, n_easy=5):
+        sorted_queries = values.sort_values(kind="stable").index
         return {
-            "hard": hard_queries,
-            "easy": easy_queries,
-            "median": np.median(values_list),
-            "mean": np.mean(values_list),
-            "min": min(values_list),
-            "max": max(values_list),
+            "hard": list(sorted_queries[:n_hard]),
+            "easy": list(sorted_queries[-n_easy:]),
+            "median": values.median(),
+            "mean": values.mean(),
+            "min": values.min(),
+            "max": values.max(),
         }
 
-    def _compare_relevance_labels(self, data, queries, relevance_labels):
-        results = {}
-        irrelevant_label = "Relevance_Label_0"
-
-        for label in relevance_labels:
-            if label == irrelevant_label:
-                continue
-
-            label_judgements = self._get_label_judgements(data, queries, label)
-            irrelevant_judgements = self._get_label_judgements(
-                data, queries, irrelevant_label
-            )
-
-            easy_queries = []
-            hard_queries = []
-            min_query = max_query = queries[0]
-            min_count = max_count = label_judgements[queries[0]]
+    def _compare_relevance_labels(self, relevance_counts: pd.DataFrame):
+        """
+        For each relevant label, and for all of them combined, find the queries
+        with at least as many documents of the label as irrelevant ones (easy),
+        those with fewer than half as many (hard), and the queries with the
+        fewest and most documents of the label.
+        """
+        irrelevant = relevance_counts["Irrelevant"]
+        relevant = relevance_counts.drop(columns="Irrelevant")
+        relevant["Combined"] = relevant.sum(axis=1)
+
+        easy = relevant.ge(irrelevant, axis=0)
+        # Arbitrary threshold for "very few"
+        hard = ~easy & relevant.lt(irrelevant / 2, axis=0)
 
-            for query in queries:
-                label_count = label_judgements[query]
-                irrelevant_count = irrelevant_judgements[query]
-
-                if label_count >= irrelevant_count:
-                    easy_queries.append(query)
-                elif (
-                    label_count < irrelevant_count / 2
-                ):  # Arbitrary threshold for "very few"
-                    hard_queries.append(query)
-
-                if label_count < min_count:
-                    min_count = label_count
-                    min_query = query
-                if label_count > max_count:
-                    max_count = label_count
-                    max_query = query
-
-            results[label] = {
-                "easy_queries": easy_queries,
-                "hard_queries": hard_queries,
-                "min_query": min_query,
-                "max_query": max_query,
+        return {
+            label: {
+                "easy_queries": list(relevant.index[easy[label]]),
+                "hard_queries": list(relevant.index[hard[label]]),
+                "min_query": relevant[label].idxmin(),
+                "max_query": relevant[label].idxmax(),
             }
-
-        # Combine all relevant labels
-        combined_judgements = {
-            q: sum(
-                self._get_label_judgements(data, [q], label)[q]
-                for label in relevance_labels
-                if label != irrelevant_label
-            )
-            for q in queries
+            for label in relevant.columns
         }
-        irrelevant_judgements = self._get_label_judgements(
-            data, queries, irrelevant_label
-        )
-
-        easy_queries = []
-        hard_queries = []
-        min_query = max_query = queries[0]
-        min_count = max_count = combined_judgements[queries[0]]
-
-        for query in queries:
-            combined_count = combined_judgements[query]
-            irrelevant_count = irrelevant_judgements[query]
-
-            if combined_count >= irrelevant_count:
-                easy_queries.append(query)
-            elif combined_count < irrelevant_count / 2:
-                hard_queries.append(query)
-
-            if combined_count < min_count:
-                min_count = combined_count
-                min_query = query
-            if combined_count > max_count:
-                max_count = combined_count
-                max_query = query
-
-        results["Combined"] = {
-            "easy_queries": easy_queries,
-            "hard_queries": hard_queries,
-            "min_query": min_query,
-            "max_query": max_query,
-        }
-
-        return results
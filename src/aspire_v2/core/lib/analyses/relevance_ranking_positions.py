@@ -1,8 +1,8 @@
 from ..interfaces import Analysis, AnalysisForm, Result
-from ...models import RetrievalTask, RetrievalRun
+from ..report_context import ReportContext
 from ..results import PlotResult
-import pandas as pd
 import matplotlib.colors as mcolors
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import math
@@ -21,15 +21,12 @@ class RelevanceRankingPositionsForm(AnalysisForm):
 class RelevanceRankingPositions(Analysis):
     name = "Retrieved Documents, Relevance, Ranking Position"
     form_class = RelevanceRankingPositionsForm
+    version = 2
 
-    def execute(
-        self,
-        retrieval_task: RetrievalTask,
-        retrieval_runs: list[RetrievalRun],
-        **parameters: dict,
-    ) -> Result:
+    def execute(self, context: ReportContext, **parameters: dict) -> Result:
         ranking_depth = parameters["ranking_depth"]
-        qrel = retrieval_task.qrels_dataframe
+        retrieval_runs = context.retrieval_runs
+        qrel = context.qrels
 
         unique_relevance = sorted(qrel["relevance"].unique())
         color_scale = self._generate_color_scale(len(unique_relevance))
@@ -53,55 +50,50 @@ class RelevanceRankingPositions(Analysis):
             horizontal_spacing=0.05,
         )
 
+        vocabulary = context.vocabulary
+        ranks = range(1, ranking_depth + 1)
+
         for i, run in enumerate(retrieval_runs, start=1):
-            run_name = run.title
-            run_df = run.dataframe
-            # Merge run data with qrel data to get relevance information
-            merged_df = pd.merge(run_df, qrel, on=["query_id", "doc_id"], how="left")
-            merged_df["relevance"] = merged_df["relevance"].fillna(
-                -100
-            )  # Mark unjudged as -100
-
-            # Filter for the specified ranking depth
-            merged_df = merged_df[merged_df["rank"] <= ranking_depth]
-
-            # Create heatmap data and hover text
-            heatmap_data = []
-            hover_text = []
-
-            for rank in range(1, ranking_depth + 1):
-                rank_data = merged_df[merged_df["rank"] == rank]
-                row_data = rank_data["relevance"].tolist()
-                row_data += [None] * (
-                    len(merged_df["query_id"].unique()) - len(row_data)
-                )  # Pad with None
-                heatmap_data.append(row_data)
-
-                hover_row = [
-                    f"Query: {query_id}<br>Rank: {rank}<br>Doc ID: {doc_id}<br>Relevance: {'Unjudged' if rel == -100 else rel}"
-                    for query_id, doc_id, rel in zip(
-                        rank_data["query_id"],
-                        rank_data["doc_id"],
-                        rank_data["relevance"],
-                    )
-                ]
-                hover_row += [None] * (
-                    len(merged_df["query_id"].unique()) - len(hover_row)
+            # Run data joined with qrel data; unjudged documents are -100
+            top = context.judged_run(run).loc[lambda df: df["rank"] <= ranking_depth]
+            top["relevance"] = top["relevance"].fillna(-100)
+
+            # One rank x query grid per run, queries in the order they appear
+            query_codes = top["query_code"].unique()
+            grid = (
+                top.drop_duplicates(["rank", "query_code"])
+                .pivot(
+                    index="rank", columns="query_code", values=["relevance", "doc_id"]
                 )
-                hover_text.append(hover_row)
+                .reindex(ranks)
+            )
+            relevance = grid["relevance"].reindex(columns=query_codes).astype(float)
+            doc_ids = grid["doc_id"].reindex(columns=query_codes).to_numpy()
+            retrieved = relevance.notna().to_numpy()
+            labels = np.where(
+                relevance == -100,
+                "Unjudged",
+                relevance.fillna(0).astype(int).astype(str),
+            )
+            customdata = np.where(
+                retrieved[..., None], np.dstack([doc_ids, labels]), None
+            )
 
             row = (i - 1) // num_cols + 1
             col = (i - 1) % num_cols + 1
 
             fig.add_trace(
                 go.Heatmap(
-                    z=heatmap_data,
-                    y=list(range(1, ranking_depth + 1)),
-                    x=merged_df["query_id"].unique(),
+                    z=relevance.to_numpy(),
+                    y=list(ranks),
+                    x=vocabulary.query_ids.take(query_codes),
                     colorscale=colorscale,
                     showscale=False,
-                    hoverinfo="text",
-                    text=hover_text,
+                    customdata=customdata,
+                    hovertemplate="Query: %{x}<br>Rank: %{y}<br>"
+                    "Doc ID: %{customdata[0]}<br>Relevance: %{customdata[1]}"
+                    "<extra></extra>",
+                    hoverongaps=False,
                     xgap=1,
                     ygap=1,
                     zmin=min_val,
@@ -1,8 +1,9 @@
 from ..interfaces import Analysis, AnalysisForm, Result
-from ...models import RetrievalTask, RetrievalRun
-from ..results import TableResult
+from ..report_context import ReportContext
+from ..results import CompositeResult, TableResult
 import numpy as np
 import pandas as pd
+import scipy
 
 from django import forms
 
@@ -36,64 +37,61 @@ class RetrievedDocumentInterseciton(Analysis):
     name = "Retrieved Document Intersection"
     form_class = RetrievedDocumentIntersectionForm
 
-    def execute(
-        self,
-        retrieval_task: RetrievalTask,
-        retrieval_runs: list[RetrievalRun],
-        **parameters: dict,
-    ) -> Result:
+    def execute(self, context: ReportContext, **parameters: dict) -> Result:
         cutoff = int(parameters["cutoff"])
-        all_queries = set()
-        all_docs = set()
-        for retrieval_run in retrieval_runs:
-            df = retrieval_run.dataframe
-            all_queries.update(df["query_id"])
-            all_docs.update(df["doc_id"])
-
-        query_map = {q: q for q in all_queries}
-        doc_map = {d: i for i, d in enumerate(all_docs)}
-
-        n_queries = len(all_queries)
-        n_docs = len(all_docs)
-        n_runs = len(retrieval_runs)
-
-        # Create a 3D numpy array to represent the data
-        data = np.zeros((n_runs, n_queries, n_docs), dtype=bool)
-
-        # Fill the array
-        for i, retrieval_run in enumerate(retrieval_runs):
-            for _, row in retrieval_run.dataframe.iterrows():
-                if row["rank"] <= cutoff:
-                    q_idx = list(query_map.keys()).index(row["query_id"])
-                    d_idx = doc_map[row["doc_id"]]
-                    data[i, q_idx, d_idx] = True
+        retrieval_runs = context.retrieval_runs
+        titles = [retrieval_run.title for retrieval_run in retrieval_runs]
+
+        top_k = [
+            context.run(retrieval_run)
+            .loc[lambda df: df["rank"] <= cutoff, ["query_code", "doc_code"]]
+            .drop_duplicates()
+            for retrieval_run in retrieval_runs
+        ]
+        pairs = pd.concat(top_k, ignore_index=True)
+
+        # Encode every (query, doc) pair as a column of a sparse runs x pairs
+        # incidence matrix; its Gram matrix holds all pairwise intersections.
+        pair_codes, pair_ids = pd.factorize(
+            pairs["query_code"].to_numpy(np.int64) * len(context.vocabulary.doc_ids)
+            + pairs["doc_code"].to_numpy()
+        )
+        run_codes = np.repeat(np.arange(len(top_k)), [len(df) for df in top_k])
+        incidence = scipy.sparse.csr_matrix(
+            (np.ones(len(pair_codes), dtype=np.int64), (run_codes, pair_codes)),
+            shape=(len(top_k), len(pair_ids)),
+        )
 
-        # Compute intersections
-        baseline_run = list(
-            filter(
-                lambda run: str(run.id) != parameters["baseline_run"],
-                retrieval_runs,
-            )
-        )[0]
-        baseline_idx = retrieval_runs.index(baseline_run)
-        baseline_data = data[baseline_idx]
-        intersections = (data & baseline_data).sum(axis=(1, 2))
+        intersections = (incidence @ incidence.T).toarray()
+        totals = np.diag(intersections)
+        unions = totals[:, None] + totals[None, :] - intersections
+        with np.errstate(divide="ignore", invalid="ignore"):
+            jaccard = np.where(unions > 0, intersections / unions, 0.0)
 
-        # Compute totals
-        totals = np.minimum(data.sum(axis=2), cutoff).sum(axis=1)
+        intersections_df = pd.DataFrame(intersections, index=titles, columns=titles)
+        jaccard_df = pd.DataFrame(jaccard, index=titles, columns=titles).round(4)
 
-        # Create DataFrame
-        df = pd.DataFrame(
+        baseline_idx = next(
+            i
+            for i, retrieval_run in enumerate(retrieval_runs)
+            if str(retrieval_run.id) == parameters["baseline_run"]
+        )
+        baseline_df = pd.DataFrame(
             {
-                "Intersected Documents": intersections,
+                "Intersected Documents": intersections[baseline_idx],
                 "Total Documents": totals,
             },
-            index=[retrieval_run.title for retrieval_run in retrieval_runs],
+            index=titles,
         )
-
-        df = df.drop(baseline_run.title)  # Remove baseline from results
-        df["Intersection Percentage"] = (
-            df["Intersected Documents"] / df["Total Documents"] * 100
+        baseline_df = baseline_df.drop(titles[baseline_idx])
+        baseline_df["Intersection Percentage"] = (
+            baseline_df["Intersected Documents"] / baseline_df["Total Documents"] * 100
         ).round(2)
 
-        return TableResult(df)
+        return CompositeResult(
+            {
+                "Intersection with the baseline run": TableResult(baseline_df),
+                "Intersected documents between runs": TableResult(intersections_df),
+                "Jaccard similarity between runs": TableResult(jaccard_df),
+            }
+        )
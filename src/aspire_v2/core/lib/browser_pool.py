@@ -0,0 +1,93 @@
+from playwright.sync_api import Browser, Page, Playwright, Route, sync_playwright
+
+# Pages load the report from this origin; every request to it is answered by
+# the route handler, and nothing else is fetched.
+ORIGIN = "http://report.invalid"
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium shared by the PDF renders of a worker process.
+
+    The browser is launched on first use, so each worker process starts its
+    own instead of inheriting one over fork. Pages are reused between renders
+    and replaced after max_page_uses renders, which bounds the memory a single
+    page can accumulate. Playwright's sync API is bound to the thread that
+    started it, so a pool must only be used from one thread.
+    """
+
+    def __init__(self, max_idle_pages: int = 2, max_page_uses: int = 50) -> None:
+        self.max_idle_pages = max_idle_pages
+        self.max_page_uses = max_page_uses
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._idle_pages: list[tuple[Page, int]] = []
+
+    def render_pdf(
+        self,
+        html: str,
+        assets: dict[str, tuple[bytes, str]],
+        timeout: float = 30_000,
+    ) -> bytes:
+        """
+        Print a page to an A4 PDF.
+
+        The page is served from ORIGIN, assets maps the paths it references
+        to their content and MIME type. Printing starts as soon as the page
+        sets window.renderReady.
+        """
+
+        def handle(route: Route) -> None:
+            path = route.request.url.removeprefix(ORIGIN).lstrip("/")
+            if not path:
+                route.fulfill(body=html, content_type="text/html; charset=utf-8")
+            elif path in assets:
+                body, content_type = assets[path]
+                route.fulfill(body=body, content_type=content_type)
+            else:
+                route.abort()
+
+        page, uses = self._acquire()
+        try:
+            page.route("**/*", handle)
+            page.goto(f"{ORIGIN}/", wait_until="load", timeout=timeout)
+            page.wait_for_function("window.renderReady === true", timeout=timeout)
+            pdf = page.pdf(format="A4", print_background=True)
+            page.unroute("**/*", handle)
+        except Exception:
+            page.close()
+            raise
+
+        self._release(page, uses + 1)
+        return pdf
+
+    def close(self) -> None:
+        if self._browser is not None:
+            self._browser.close()
+        if self._playwright is not None:
+            self._playwright.stop()
+        self._playwright = None
+        self._browser = None
+        self._idle_pages.clear()
+
+    def _acquire(self) -> tuple[Page, int]:
+        if self._browser is None or not self._browser.is_connected():
+            self.close()
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch()
+
+        while self._idle_pages:
+            page, uses = self._idle_pages.pop()
+            if not page.is_closed():
+                return page, uses
+        return self._browser.new_page(), 0
+
+    def _release(self, page: Page, uses: int) -> None:
+        if uses >= self.max_page_uses or len(self._idle_pages) >= self.max_idle_pages:
+            page.close()
+            return
+        page.goto("about:blank")
+        self._idle_pages.append((page, uses))
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,71 @@
+from collections import OrderedDict
+from collections.abc import Callable
+from threading import Lock
+
+from django.conf import settings
+import pandas as pd
+
+
+class FrameCache:
+    """
+    Process-wide LRU cache of decoded dataframes with a memory budget.
+
+    Frames are keyed by the identity of the file they were decoded from and
+    handed out as shallow copies, so callers never modify the cached data.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._frames: OrderedDict[str, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._lock = Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self, key: str, load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return self._frames[key][0].copy(deep=False)
+            self.misses += 1
+
+        df = load()
+        self.put(key, df)
+        return df.copy(deep=False)
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._frames:
+                self.size -= self._frames.pop(key)[1]
+            self._frames[key] = (df, nbytes)
+            self.size += nbytes
+
+            while self.size > self.max_bytes:
+                _, (_, evicted_nbytes) = self._frames.popitem(last=False)
+                self.size -= evicted_nbytes
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "frames": len(self._frames),
+                "size": self.size,
+                "max_size": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+frame_cache = FrameCache(settings.FRAME_CACHE_MAX_BYTES)
@@ -3,7 +3,7 @@ from typing import ClassVar
 
 from django.forms import Form
 
-from ...models import RetrievalTask, RetrievalRun
+from ..report_context import ReportContext
 from .result import Result
 from .analysis_form import AnalysisForm
 
@@ -13,12 +13,10 @@ class Analysis(ABC):
 
     name: ClassVar[str]
     form_class: ClassVar[type[AnalysisForm]]
+    # Part of the key under which results are reused; increment it whenever
+    # a change to the analysis changes its results.
+    version: ClassVar[int] = 1
 
     @abstractmethod
-    def execute(
-        self,
-        retrieval_task: RetrievalTask,
-        retrieval_runs: list[RetrievalRun],
-        **parameters: dict,
-    ) -> Result:
+    def execute(self, context: ReportContext, **parameters: dict) -> Result:
         """Execute the analysis."""
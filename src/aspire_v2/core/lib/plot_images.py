@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+import kaleido
+
+from pathlib import Path
+import hashlib
+import json
+import tempfile
+
+WIDTH = 800
+HEIGHT = 400
+
+
+def plot_image_name(plot: dict) -> str:
+    """Storage name of the PNG of a serialized plot, derived from its content."""
+    content = json.dumps(
+        [plot, WIDTH, HEIGHT], sort_keys=True, separators=(",", ":")
+    ).encode()
+    return f"plot_images/{hashlib.sha256(content).hexdigest()}.png"
+
+
+def rasterize(plots: list[dict]) -> list[bytes]:
+    """
+    PNG images of serialized plots.
+
+    Images are cached in object storage by content hash, so a plot is only
+    ever rasterized once. Missing images are rendered together by a single
+    browser with several tabs working concurrently.
+    """
+    names = [plot_image_name(plot) for plot in plots]
+    images = {}
+    missing = {}
+    for name, plot in zip(names, plots):
+        if name in images or name in missing:
+            continue
+        if default_storage.exists(name):
+            with default_storage.open(name, "rb") as f:
+                images[name] = f.read()
+        else:
+            missing[name] = plot
+
+    if missing:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = {name: Path(directory) / Path(name).name for name in missing}
+            kaleido.write_fig_from_object_sync(
+                [
+                    {
+                        "fig": plot,
+                        "path": paths[name],
+                        "opts": {"format": "png", "width": WIDTH, "height": HEIGHT},
+                    }
+                    for name, plot in missing.items()
+                ],
+                kopts={"n": min(len(missing), settings.PLOT_RASTERIZATION_TABS)},
+            )
+            for name, path in paths.items():
+                images[name] = path.read_bytes()
+                default_storage.save(name, ContentFile(images[name]))
+
+    return [images[name] for name in names]
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from ..models import RetrievalTask, RetrievalRun
+from .frame_cache import frame_cache
+from .vocabulary import Vocabulary
+
+
+class ReportContext:
+    """
+    Data shared by the analyses executed for a report.
+
+    The qrels and every run are loaded once. The join of each run with the
+    qrels is built on first use and kept in the frame cache, so all the
+    analyses a worker executes for a report share it. Query and document
+    ids are also available as integer codes from the task vocabulary, which
+    is what joins and set operations should use. Analyses receive shallow
+    copies, so with copy-on-write enabled they can never modify the shared
+    frames.
+    """
+
+    def __init__(
+        self, retrieval_task: RetrievalTask, retrieval_runs: list[RetrievalRun]
+    ) -> None:
+        self.retrieval_task = retrieval_task
+        self.retrieval_runs = retrieval_runs
+
+        # Share one task instance, so that every run reuses its parsed qrels.
+        for retrieval_run in retrieval_runs:
+            retrieval_run.ir_task = retrieval_task
+
+    @property
+    def qrels(self) -> pd.DataFrame:
+        return self.retrieval_task.qrels_dataframe.copy(deep=False)
+
+    @property
+    def vocabulary(self) -> Vocabulary:
+        return self.retrieval_task.get_vocabulary()
+
+    def run(self, retrieval_run: RetrievalRun) -> pd.DataFrame:
+        return retrieval_run.dataframe.copy(deep=False)
+
+    def judged_run(self, retrieval_run: RetrievalRun) -> pd.DataFrame:
+        """Run joined with the qrels; unjudged documents have NaN relevance."""
+        run = retrieval_run.dataframe
+        qrels = self.retrieval_task.qrels_dataframe
+        return frame_cache.get_or_load(
+            f"judged/{retrieval_run.artifact.name}/"
+            f"{self.retrieval_task.qrels_artifact.name}",
+            lambda: pd.merge(
+                run,
+                qrels[["query_code", "doc_code", "relevance"]],
+                on=["query_code", "doc_code"],
+                how="left",
+            ),
+        )
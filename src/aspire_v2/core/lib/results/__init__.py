@@ -1,6 +1,13 @@
 from .value import ValueResult
 from .table import TableResult
-from .plot import PlotResult
+from .plot import PlotResult, decode_plot, plot_template
 from .composite import CompositeResult
 
-__all__ = [ValueResult, TableResult, PlotResult, CompositeResult]
+__all__ = [
+    ValueResult,
+    TableResult,
+    PlotResult,
+    CompositeResult,
+    decode_plot,
+    plot_template,
+]
@@ -1,14 +1,122 @@
 from ..interfaces import Result
 
+import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
 
+from functools import cache
+import base64
+import gzip
 import json
 
+# Serialized figures larger than this are stored gzip-compressed.
+COMPRESSION_THRESHOLD = 64 * 1024
+
+# Typed arrays plotly.js decodes, by numpy dtype.
+TYPED_ARRAY_DTYPES = {
+    "int8": "i1",
+    "uint8": "u1",
+    "int16": "i2",
+    "uint16": "u2",
+    "int32": "i4",
+    "uint32": "u4",
+    "float32": "f4",
+    "float64": "f8",
+}
+
 
 class PlotResult(Result):
+    """
+    A Plotly figure, stored in a compact form.
+
+    The default template is replaced by its name, numeric arrays are stored
+    as base64 typed arrays and large figures are compressed. decode_plot
+    (and decodePlot on the report page) restore the full figure.
+    """
+
     def __init__(self, figure: go.Figure):
         self.fig = figure
 
     def serialize(self):
         value = json.loads(self.fig.to_json())
-        return {"type": "plot", "value": value}
+        serialized = {"type": "plot"}
+
+        if value.get("layout", {}).get("template") == plot_template(
+            pio.templates.default
+        ):
+            del value["layout"]["template"]
+            serialized["template"] = pio.templates.default
+
+        for trace in value.get("data", []):
+            _encode_arrays(trace)
+
+        content = json.dumps(value, separators=(",", ":"))
+        if len(content) > COMPRESSION_THRESHOLD:
+            serialized["encoding"] = "gzip"
+            serialized["value"] = base64.b64encode(
+                gzip.compress(content.encode(), mtime=0)
+            ).decode("ascii")
+        else:
+            serialized["value"] = value
+        return serialized
+
+
+def decode_plot(serialized: dict) -> dict:
+    """Full Plotly figure of a serialized PlotResult."""
+    value = serialized["value"]
+    if serialized.get("encoding") == "gzip":
+        value = json.loads(gzip.decompress(base64.b64decode(value)))
+    if "template" in serialized:
+        value.setdefault("layout", {})["template"] = plot_template(
+            serialized["template"]
+        )
+    return value
+
+
+@cache
+def plot_template(name: str) -> dict:
+    """Serialized Plotly template stripped from stored figures."""
+    figure = go.Figure(layout={"template": name})
+    return json.loads(figure.to_json())["layout"]["template"]
+
+
+def _encode_arrays(obj: dict) -> None:
+    for key, value in obj.items():
+        if isinstance(value, dict):
+            _encode_arrays(value)
+        elif isinstance(value, list) and len(value) > 1:
+            try:
+                array = np.asarray(value)
+            except ValueError:
+                continue
+            if array.dtype.kind in "iuf":
+                spec = _typed_array(array)
+                # Arrays plotly.js has no typed array for stay lists.
+                if spec is not None:
+                    obj[key] = spec
+
+
+def _typed_array(array: np.ndarray) -> dict | None:
+    """plotly.js typed array ({"dtype", "bdata"[, "shape"]}) of a numeric array."""
+    if array.dtype.kind in "iu" and array.dtype.itemsize == 8:
+        # plotly.js has no 64-bit integers; use the smallest type that fits.
+        if array.dtype.kind == "i":
+            candidates = [np.int8, np.int16, np.int32]
+        else:
+            candidates = [np.uint8, np.uint16, np.uint32]
+        low, high = array.min(), array.max()
+        for candidate in candidates:
+            if np.iinfo(candidate).min <= low and high <= np.iinfo(candidate).max:
+                array = array.astype(candidate)
+                break
+        else:
+            return None
+
+    dtype = TYPED_ARRAY_DTYPES.get(array.dtype.name)
+    if dtype is None:
+        return None
+    data = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+    spec = {"dtype": dtype, "bdata": base64.b64encode(data.tobytes()).decode("ascii")}
+    if array.ndim > 1:
+        spec["shape"] = ", ".join(str(n) for n in array.shape)
+    return spec
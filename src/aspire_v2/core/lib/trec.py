@@ -0,0 +1,69 @@
+from typing import BinaryIO
+import io
+import re
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv
+
+RUN_COLUMNS = {
+    "query_id": pa.string(),
+    "iteration": pa.string(),
+    "doc_id": pa.string(),
+    "rank": pa.int32(),
+    "score": pa.float64(),
+    "tag": pa.string(),
+}
+
+QRELS_COLUMNS = {
+    "query_id": pa.string(),
+    "iteration": pa.string(),
+    "doc_id": pa.string(),
+    "relevance": pa.int32(),
+}
+
+_WHITESPACE = re.compile(rb"[ \t\r\f\v]+")
+_LINE_EDGES = re.compile(rb"^ | $", re.MULTILINE)
+_BLANK_LINES = re.compile(rb"^[ \t\r\f\v]+$", re.MULTILINE)
+
+
+def read_run(f: BinaryIO) -> pd.DataFrame:
+    """Parse a TREC run file: query_id, iteration, doc_id, rank, score, tag."""
+    return _read_trec(f.read(), RUN_COLUMNS)
+
+
+def read_qrels(f: BinaryIO) -> pd.DataFrame:
+    """Parse a TREC qrels file: query_id, iteration, doc_id, relevance."""
+    return _read_trec(f.read(), QRELS_COLUMNS)
+
+
+def _read_trec(data: bytes, columns: dict[str, pa.DataType]) -> pd.DataFrame:
+    # Whitespace-only lines are emptied, and empty lines are skipped.
+    data = _BLANK_LINES.sub(b"", data)
+
+    # Files consistently separated by either tabs or spaces are parsed as they
+    # are; anything else is normalized to single spaces and parsed again.
+    if b" " not in data or b"\t" not in data:
+        try:
+            return _parse(data, "\t" if b"\t" in data else " ", columns)
+        except pa.ArrowInvalid:
+            pass
+
+    try:
+        return _parse(_LINE_EDGES.sub(b"", _WHITESPACE.sub(b" ", data)), " ", columns)
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Invalid TREC file: {e}") from e
+
+
+def _parse(
+    data: bytes, delimiter: str, columns: dict[str, pa.DataType]
+) -> pd.DataFrame:
+    table = csv.read_csv(
+        io.BytesIO(data),
+        read_options=csv.ReadOptions(column_names=list(columns), use_threads=True),
+        parse_options=csv.ParseOptions(delimiter=delimiter, quote_char=False),
+        convert_options=csv.ConvertOptions(
+            column_types=columns, null_values=[], strings_can_be_null=False
+        ),
+    )
+    return table.to_pandas()
@@ -15,19 +15,7 @@ def get_query_rel_judgements(qrels: pd.DataFrame):
         for col in relevance_counts.columns
     ]
 
-    results = {}
-    for query_id in relevance_counts.index:
-        results[query_id] = {
-            "irrelevant": int(relevance_counts.loc[query_id, "Irrelevant"]),
-            "relevant": {},
-        }
-        for column in relevance_counts.columns:
-            if column != "Irrelevant":
-                results[query_id]["relevant"][column] = int(
-                    relevance_counts.loc[query_id, column]
-                )
-
-    return relevance_counts, results
+    return relevance_counts
 
 
 def sort_query_ids(query_ids):
@@ -1,39 +1,151 @@
+from collections import defaultdict
+
 from ir_measures import parse_measure, calc_aggregate, iter_calc
+import pandas as pd
 
 from ..interfaces import Measure
-from ...models import MeasureValue, RetrievalRun
+from ...models import MeasureValue, PerQueryMeasureValue, RetrievalRun
+
+
+def _parse_measures(measures: list[Measure]) -> dict:
+    """Map each parsed ir_measures measure to the measure names it stands for."""
+    parsed = defaultdict(list)
+    for measure in measures:
+        parsed[parse_measure(measure.measure_name)].append(measure.measure_name)
+    return parsed
+
+
+def get_aggregate_measures(
+    retrieval_runs: list[RetrievalRun], measures: list[Measure]
+) -> pd.DataFrame:
+    """
+    Aggregate values of all measures for all runs.
+
+    Stored values are read in one query; each run is evaluated once for all
+    measures missing from the store, and the new values are written with a
+    single upsert. Returns a dataframe indexed by measure name with one
+    column per run id.
+    """
+    measure_names = [measure.measure_name for measure in measures]
+    values = {
+        (retrieval_run_id, measure_name): value
+        for retrieval_run_id, measure_name, value in MeasureValue.objects.filter(
+            retrieval_run__in=retrieval_runs, measure_name__in=measure_names
+        ).values_list("retrieval_run_id", "measure_name", "value")
+    }
 
+    new_values = []
+    for retrieval_run in retrieval_runs:
+        missing = [
+            measure
+            for measure in measures
+            if (retrieval_run.id, measure.measure_name) not in values
+        ]
+        if not missing:
+            continue
 
-def get_aggregate_measure(retrieval_run: RetrievalRun, measure: Measure) -> float:
-    try:
-        measure_value = MeasureValue.objects.get(
-            pk=(retrieval_run.id, measure.measure_name)
+        ir_measures = _parse_measures(missing)
+        agg = calc_aggregate(
+            list(ir_measures),
+            retrieval_run.ir_task.qrels_dataframe,
+            retrieval_run.dataframe,
         )
-        return measure_value.value
-    except MeasureValue.DoesNotExist:
-        run_df = retrieval_run.dataframe
-        qrels_df = retrieval_run.ir_task.qrels_dataframe
-        ir_measure = parse_measure(measure.measure_name)
-
-        agg = calc_aggregate([ir_measure], qrels_df, run_df)
-        value = agg[ir_measure]
-        MeasureValue.objects.create(
-            retrieval_run=retrieval_run,
-            measure_name=measure.measure_name,
-            value=value,
+        for ir_measure, names in ir_measures.items():
+            for name in names:
+                values[(retrieval_run.id, name)] = agg[ir_measure]
+                new_values.append(
+                    MeasureValue(
+                        retrieval_run=retrieval_run,
+                        measure_name=name,
+                        value=agg[ir_measure],
+                    )
+                )
+
+    MeasureValue.objects.bulk_create(
+        new_values,
+        update_conflicts=True,
+        unique_fields=["retrieval_run", "measure_name"],
+        update_fields=["value"],
+    )
+
+    return pd.DataFrame(
+        {
+            retrieval_run.id: [
+                values[(retrieval_run.id, name)] for name in measure_names
+            ]
+            for retrieval_run in retrieval_runs
+        },
+        index=measure_names,
+    )
+
+
+def get_per_query_measures(
+    retrieval_runs: list[RetrievalRun], measures: list[Measure]
+) -> pd.DataFrame:
+    """
+    Per-query values of all measures for all runs.
+
+    Stored values are read in one query; each run is evaluated once for all
+    measures missing from the store, and the new values are written in bulk.
+    Returns a dataframe indexed by (run id, query id) with one column per
+    measure name.
+    """
+    measure_names = [measure.measure_name for measure in measures]
+    values = {
+        (stored.retrieval_run_id, stored.measure_name): stored.values
+        for stored in PerQueryMeasureValue.objects.filter(
+            retrieval_run__in=retrieval_runs, measure_name__in=measure_names
         )
-        return value
+    }
+
+    new_values = []
+    for retrieval_run in retrieval_runs:
+        missing = [
+            measure
+            for measure in measures
+            if (retrieval_run.id, measure.measure_name) not in values
+        ]
+        if not missing:
+            continue
 
+        ir_measures = _parse_measures(missing)
+        run_values = defaultdict(dict)
+        for query_result in iter_calc(
+            list(ir_measures),
+            retrieval_run.ir_task.qrels_dataframe,
+            retrieval_run.dataframe,
+        ):
+            for name in ir_measures[query_result.measure]:
+                run_values[name][query_result.query_id] = query_result.value
 
-def get_per_query_measure(
-    retrieval_run: RetrievalRun, measure: Measure
-) -> dict[str, float]:
-    run_df = retrieval_run.dataframe
-    qrels_df = retrieval_run.ir_task.qrels_dataframe
-    ir_measure = parse_measure(measure.measure_name)
+        for name in {measure.measure_name for measure in missing}:
+            values[(retrieval_run.id, name)] = run_values[name]
+            new_values.append(
+                PerQueryMeasureValue(
+                    retrieval_run=retrieval_run,
+                    measure_name=name,
+                    values=run_values[name],
+                )
+            )
 
-    result = {}
-    for query_result in iter_calc([ir_measure], qrels_df, run_df):
-        result[query_result.query_id] = query_result.value
+    PerQueryMeasureValue.objects.bulk_create(
+        new_values,
+        update_conflicts=True,
+        unique_fields=["retrieval_run", "measure_name"],
+        update_fields=["values"],
+    )
 
-    return result
+    return pd.DataFrame(
+        {
+            name: pd.concat(
+                {
+                    retrieval_run.id: pd.Series(
+                        values[(retrieval_run.id, name)], dtype=float
+                    )
+                    for retrieval_run in retrieval_runs
+                },
+                names=["run_id", "query_id"],
+            )
+            for name in measure_names
+        }
+    )
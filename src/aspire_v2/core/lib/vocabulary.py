@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+class Vocabulary:
+    """
+    Dense int32 codes for the query and document ids of a retrieval task.
+
+    Codes are assigned in order of first appearance and never change, so
+    frames encoded with an older version of a vocabulary remain valid.
+    Decoded frames reference the vocabulary's string objects instead of
+    holding their own copies.
+    """
+
+    def __init__(self, query_ids: pd.Index, doc_ids: pd.Index) -> None:
+        self.query_ids = query_ids
+        self.doc_ids = doc_ids
+
+    @classmethod
+    def empty(cls) -> "Vocabulary":
+        return cls(pd.Index([], dtype=object), pd.Index([], dtype=object))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "Vocabulary":
+        is_query = (df["kind"] == "query").to_numpy()
+        return cls(
+            pd.Index(df["id"].to_numpy()[is_query]),
+            pd.Index(df["id"].to_numpy()[~is_query]),
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "kind": ["query"] * len(self.query_ids) + ["doc"] * len(self.doc_ids),
+                "id": self.query_ids.append(self.doc_ids),
+            }
+        )
+
+    def __len__(self) -> int:
+        return len(self.query_ids) + len(self.doc_ids)
+
+    def covers(self, df: pd.DataFrame) -> bool:
+        """Whether every code of an encoded frame is known to this version."""
+        return df.empty or (
+            df["query_code"].max() < len(self.query_ids)
+            and df["doc_code"].max() < len(self.doc_ids)
+        )
+
+    def encode(self, df: pd.DataFrame) -> tuple[pd.DataFrame, "Vocabulary"]:
+        """
+        Add query_code and doc_code columns to a frame.
+
+        Returns the encoded frame and the vocabulary extended with the ids
+        it did not know yet.
+        """
+        query_codes, query_ids = _encode(self.query_ids, df["query_id"])
+        doc_codes, doc_ids = _encode(self.doc_ids, df["doc_id"])
+        return (
+            df.assign(query_code=query_codes, doc_code=doc_codes),
+            Vocabulary(query_ids, doc_ids),
+        )
+
+    def decode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Restore the query_id and doc_id columns of an encoded frame."""
+        df = df.copy(deep=False)
+        df.insert(0, "query_id", self.query_ids.take(df["query_code"]).to_numpy())
+        df.insert(2, "doc_id", self.doc_ids.take(df["doc_code"]).to_numpy())
+        return df
+
+
+def _encode(ids: pd.Index, values: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    codes = ids.get_indexer(values)
+    missing = codes == -1
+    if missing.any():
+        new_ids = pd.Index(pd.unique(values[missing]))
+        codes[missing] = len(ids) + new_ids.get_indexer(values[missing])
+        ids = ids.append(new_ids)
+    return codes.astype(np.int32), ids
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+import numpy as np
+import pandas as pd
+
+from core.lib.trec import read_run
+
+import io
+import time
+
+
+class Command(BaseCommand):
+    help = "Compare TREC run parsing speed on a synthetic run"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=2000)
+        parser.add_argument("--depth", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        data = self._synthetic_run(options["queries"], options["depth"])
+        self.stdout.write(
+            f"Synthetic run: {options['queries'] * options['depth']} lines, "
+            f"{len(data) / 1024**2:.1f} MiB"
+        )
+
+        for name, parse in [
+            ("pandas.read_csv", self._read_csv),
+            ("trec.read_run", read_run),
+        ]:
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                parse(io.BytesIO(data))
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(f"{name}: best of {len(timings)} {min(timings):.3f}s")
+
+    def _synthetic_run(self, queries: int, depth: int) -> bytes:
+        rng = np.random.default_rng(0)
+        n = queries * depth
+        df = pd.DataFrame(
+            {
+                "query_id": np.repeat(np.arange(queries), depth),
+                "iteration": "Q0",
+                "doc_id": [f"doc{i}" for i in rng.integers(0, 10 * n, n)],
+                "rank": np.tile(np.arange(1, depth + 1), queries),
+                "score": np.tile(np.linspace(100, 0, depth), queries),
+                "tag": "synthetic",
+            }
+        )
+        return df.to_csv(sep="\t", header=False, index=False).encode()
+
+    def _read_csv(self, f) -> pd.DataFrame:
+        """The loader used before core.lib.trec."""
+        return pd.read_csv(
+            f,
+            sep="\t",
+            names=["query_id", "iteration", "doc_id", "rank", "score", "tag"],
+            dtype={
+                "query_id": "object",
+                "iteration": "object",
+                "doc_id": "object",
+                "rank": np.int32,
+                "score": np.float64,
+                "tag": "object",
+            },
+        )
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_report_pdf'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='analysisresult',
+            options={'ordering': ['date']},
+        ),
+        migrations.AddField(
+            model_name='retrievalrun',
+            name='artifact',
+            field=models.FileField(editable=False, null=True, upload_to='runs'),
+        ),
+        migrations.AddField(
+            model_name='retrievaltask',
+            name='qrels_artifact',
+            field=models.FileField(editable=False, null=True, upload_to='qrels'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_retrievalrun_artifact_retrievaltask_qrels_artifact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerQueryMeasureValue',
+            fields=[
+                ('pk', models.CompositePrimaryKey('retrieval_run', 'measure_name', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('measure_name', models.CharField(max_length=100)),
+                ('values', models.JSONField()),
+                ('retrieval_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='per_query_measures', to='core.retrievalrun')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_perquerymeasurevalue'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='analysisresult',
+            options={'ordering': ['position', 'date']},
+        ),
+        migrations.AddField(
+            model_name='analysisresult',
+            name='position',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_analysisresult_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='retrievalrun',
+            name='statistics',
+            field=models.JSONField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_retrievalrun_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='retrievaltask',
+            name='qrels_metadata',
+            field=models.JSONField(editable=False, null=True),
+        ),
+    ]
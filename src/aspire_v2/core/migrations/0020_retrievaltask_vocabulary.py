@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+def clear_artifacts(apps, schema_editor):
+    # Artifacts written before the vocabulary existed hold string ids; they
+    # are rebuilt with id codes the next time they are loaded.
+    apps.get_model('core', 'RetrievalTask').objects.update(qrels_artifact=None)
+    apps.get_model('core', 'RetrievalRun').objects.update(artifact=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_retrievaltask_qrels_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='retrievaltask',
+            name='vocabulary',
+            field=models.FileField(editable=False, null=True, upload_to='vocabularies'),
+        ),
+        migrations.RunPython(clear_artifacts, migrations.RunPython.noop),
+    ]
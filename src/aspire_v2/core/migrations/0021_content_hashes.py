@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_retrievaltask_vocabulary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisresult',
+            name='cache_key',
+            field=models.CharField(db_index=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='retrievalrun',
+            name='file_hash',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='retrievaltask',
+            name='qrels_hash',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:19
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_content_hashes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='retrievalrun',
+            name='file',
+            field=models.FileField(upload_to=core.models._run_upload_to),
+        ),
+        migrations.AlterField(
+            model_name='retrievaltask',
+            name='qrels',
+            field=models.FileField(upload_to=core.models._qrels_upload_to),
+        ),
+    ]
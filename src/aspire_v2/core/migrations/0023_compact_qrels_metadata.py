@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def compact_qrels_metadata(apps, schema_editor):
+    # Per-query judgment counts made the metadata grow with the number of
+    # queries; keep their totals only.
+    RetrievalTask = apps.get_model('core', 'RetrievalTask')
+    tasks = RetrievalTask.objects.exclude(qrels_metadata=None).only('qrels_metadata')
+    for task in tasks.iterator():
+        metadata = task.qrels_metadata
+        judged_per_query = metadata.pop('judged_per_query', None)
+        metadata.pop('query_ids', None)
+        if judged_per_query is not None:
+            metadata['number_of_queries'] = len(judged_per_query)
+            metadata['number_of_judgments'] = sum(judged_per_query.values())
+        task.save(update_fields=['qrels_metadata'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_content_addressed_uploads'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_qrels_metadata, migrations.RunPython.noop),
+    ]
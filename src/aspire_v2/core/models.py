@@ -1,14 +1,60 @@
-from django.db import models
+from django.db import models, transaction
+from django.core.files.base import ContentFile
 from django.utils.functional import cached_property
+from django.db.models.fields.files import FieldFile
 from accounts.models import User
-import numpy as np
+from .lib.frame_cache import frame_cache
+from .lib.trec import read_qrels, read_run
+from .lib.vocabulary import Vocabulary
 import pandas as pd
 
+import hashlib
+import io
 import uuid
 
 # from .lib.analyses import all_analyses
 
 
+def _to_parquet(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def _read_parquet(file: FieldFile) -> pd.DataFrame:
+    with file.open("rb") as f:
+        return pd.read_parquet(f)
+
+
+def _sha256(file: FieldFile) -> str:
+    with file.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def content_addressed_name(directory: str, sha256: str) -> str:
+    return f"{directory}/{sha256[:2]}/{sha256}"
+
+
+# Files saved without knowing their hash keep their original names.
+
+
+def _qrels_upload_to(instance: "RetrievalTask", filename: str) -> str:
+    if instance.qrels_hash is None:
+        return f"qrels/{filename}"
+    return content_addressed_name("qrels", instance.qrels_hash)
+
+
+def _run_upload_to(instance: "RetrievalRun", filename: str) -> str:
+    if instance.file_hash is None:
+        return f"runs/{filename}"
+    return content_addressed_name("runs", instance.file_hash)
+
+
+def _without_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """Encoded frames are stored with their id codes only."""
+    return df.drop(columns=["query_id", "doc_id"])
+
+
 class Report(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=250)
@@ -24,8 +70,12 @@ class AnalysisResult(models.Model):
     report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name="results")
     analysis_type = models.CharField(max_length=100)
     parameters = models.JSONField()
+    position = models.PositiveSmallIntegerField(default=0)
     date = models.DateTimeField(auto_now_add=True)
     result = models.JSONField()
+    cache_key = models.CharField(
+        max_length=64, null=True, editable=False, db_index=True
+    )
 
     @property
     def analysis_display_name(self):
@@ -34,14 +84,18 @@ class AnalysisResult(models.Model):
         return all_analyses[self.analysis_type].name
 
     class Meta:
-        ordering = ["date"]
+        ordering = ["position", "date"]
 
 
 class RetrievalTask(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=100)
     description = models.TextField(max_length=500)
-    qrels = models.FileField(upload_to="qrels")
+    qrels = models.FileField(upload_to=_qrels_upload_to)
+    qrels_artifact = models.FileField(upload_to="qrels", null=True, editable=False)
+    qrels_metadata = models.JSONField(null=True, editable=False)
+    qrels_hash = models.CharField(max_length=64, null=True, editable=False)
+    vocabulary = models.FileField(upload_to="vocabularies", null=True, editable=False)
     topics = models.FileField(upload_to="topics")
     date = models.DateField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="ir_tasks")
@@ -51,25 +105,134 @@ class RetrievalTask(models.Model):
 
     @cached_property
     def qrels_dataframe(self) -> pd.DataFrame:
-        with self.qrels.open("rb") as f:
-            return pd.read_csv(
-                f,
-                sep=" ",
-                names=["query_id", "iteration", "doc_id", "relevance"],
-                dtype={
-                    "query_id": "object",
-                    "iteration": "object",
-                    "doc_id": "object",
-                    "relevance": np.int32,
-                },
+        if not self.qrels_artifact:
+            return self.build_qrels_artifact()
+        return frame_cache.get_or_load(
+            self.qrels_artifact.name,
+            lambda: self.decode(_read_parquet(self.qrels_artifact)),
+        )
+
+    def build_qrels_artifact(self, df: pd.DataFrame | None = None) -> pd.DataFrame:
+        """Store the parsed qrels file as a Parquet file next to it."""
+        if df is None:
+            with self.qrels.open("rb") as f:
+                df = read_qrels(f)
+
+        df = _without_ids(self.encode(df))
+        self.qrels_artifact.save(
+            f"{self.id}.parquet",
+            ContentFile(_to_parquet(df)),
+            save=False,
+        )
+        self.save(update_fields=["qrels_artifact"])
+        df = self.decode(df)
+        frame_cache.put(self.qrels_artifact.name, df)
+        self.__dict__["qrels_dataframe"] = df.copy(deep=False)
+        return self.qrels_dataframe
+
+    def get_qrels_hash(self) -> str:
+        """SHA-256 of the qrels file."""
+        if self.qrels_hash is None:
+            self.qrels_hash = _sha256(self.qrels)
+            self.save(update_fields=["qrels_hash"])
+        return self.qrels_hash
+
+    @property
+    def max_relevance(self) -> int:
+        if self.qrels_metadata is None:
+            self.update_qrels_metadata()
+        return self.qrels_metadata["max_relevance"]
+
+    def update_qrels_metadata(self) -> dict:
+        """
+        Compute and store the facts about the qrels needed by the forms.
+
+        The metadata is loaded with every task, so it only holds values of a
+        fixed size; per-query figures are derived from the qrels artifact.
+        """
+        df = self.qrels_dataframe
+        label_counts = df["relevance"].value_counts().sort_index()
+        self.qrels_metadata = {
+            "max_relevance": int(df["relevance"].max()),
+            "label_counts": {
+                str(label): int(count) for label, count in label_counts.items()
+            },
+            "number_of_queries": int(df["query_code"].nunique()),
+            "number_of_judgments": len(df),
+        }
+        self.save(update_fields=["qrels_metadata"])
+        return self.qrels_metadata
+
+    def get_vocabulary(self) -> Vocabulary:
+        if not self.vocabulary:
+            return Vocabulary.empty()
+        try:
+            frame = frame_cache.get_or_load(
+                self.vocabulary.name, lambda: _read_parquet(self.vocabulary)
+            )
+        except FileNotFoundError:
+            # A superseded version was deleted; load the current one.
+            self.refresh_from_db(fields=["vocabulary"])
+            frame = frame_cache.get_or_load(
+                self.vocabulary.name, lambda: _read_parquet(self.vocabulary)
             )
+        return Vocabulary.from_frame(frame)
+
+    def encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add the query_code and doc_code columns, extending the vocabulary."""
+        with transaction.atomic():
+            # Concurrent uploads to the same task must not assign a code twice.
+            task = RetrievalTask.objects.select_for_update().get(pk=self.pk)
+            vocabulary = task.get_vocabulary()
+            df, extended = vocabulary.encode(df)
+            if len(extended) > len(vocabulary):
+                # The previous version is kept for instances loaded before
+                # this one; it remains a valid prefix of the extended
+                # vocabulary. Instances referencing an older, deleted version
+                # reload the current one in get_vocabulary.
+                keep = {task.vocabulary.name}
+                frame = extended.to_frame()
+                task.vocabulary.save(
+                    f"{self.id}_{len(extended.query_ids)}_{len(extended.doc_ids)}"
+                    ".parquet",
+                    ContentFile(_to_parquet(frame)),
+                    save=False,
+                )
+                task.save(update_fields=["vocabulary"])
+                frame_cache.put(task.vocabulary.name, frame)
+                keep.add(task.vocabulary.name)
+                transaction.on_commit(lambda: task.delete_vocabularies(keep))
+
+        self.vocabulary = task.vocabulary.name
+        return df
+
+    def delete_vocabularies(self, keep: set[str]) -> None:
+        """Delete the vocabulary files of this task not named in keep."""
+        storage = self.vocabulary.storage
+        _, files = storage.listdir("vocabularies")
+        for file in files:
+            name = f"vocabularies/{file}"
+            if file.startswith(f"{self.id}_") and name not in keep:
+                storage.delete(name)
+
+    def decode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Restore the query_id and doc_id columns of a stored frame."""
+        vocabulary = self.get_vocabulary()
+        if not vocabulary.covers(df):
+            # The vocabulary was extended since this instance was loaded.
+            self.refresh_from_db(fields=["vocabulary"])
+            vocabulary = self.get_vocabulary()
+        return vocabulary.decode(df)
 
 
 class RetrievalRun(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=100)
     description = models.TextField(max_length=500)
-    file = models.FileField(upload_to="runs")
+    file = models.FileField(upload_to=_run_upload_to)
+    artifact = models.FileField(upload_to="runs", null=True, editable=False)
+    statistics = models.JSONField(null=True, editable=False)
+    file_hash = models.CharField(max_length=64, null=True, editable=False)
     date = models.DateField(auto_now_add=True)
     ir_task = models.ForeignKey(
         RetrievalTask, on_delete=models.CASCADE, related_name="retrieval_runs"
@@ -81,20 +244,61 @@ class RetrievalRun(models.Model):
 
     @cached_property
     def dataframe(self) -> pd.DataFrame:
-        with self.file.open("rb") as f:
-            return pd.read_csv(
-                f,
-                sep="\t",
-                names=["query_id", "iteration", "doc_id", "rank", "score", "tag"],
-                dtype={
-                    "query_id": "object",
-                    "iteration": "object",
-                    "doc_id": "object",
-                    "rank": np.int32,
-                    "score": np.float64,
-                    "tag": "object",
-                },
-            )
+        if not self.artifact:
+            return self.build_artifact()
+        return frame_cache.get_or_load(
+            self.artifact.name,
+            lambda: self.ir_task.decode(_read_parquet(self.artifact)),
+        )
+
+    def build_artifact(self, df: pd.DataFrame | None = None) -> pd.DataFrame:
+        """Store the parsed run file as a Parquet file next to it."""
+        if df is None:
+            with self.file.open("rb") as f:
+                df = read_run(f)
+
+        df = _without_ids(self.ir_task.encode(df))
+        self.artifact.save(
+            f"{self.id}.parquet",
+            ContentFile(_to_parquet(df)),
+            save=False,
+        )
+        self.save(update_fields=["artifact"])
+        df = self.ir_task.decode(df)
+        frame_cache.put(self.artifact.name, df)
+        self.__dict__["dataframe"] = df.copy(deep=False)
+        return self.dataframe
+
+    def get_file_hash(self) -> str:
+        """SHA-256 of the run file."""
+        if self.file_hash is None:
+            self.file_hash = _sha256(self.file)
+            self.save(update_fields=["file_hash"])
+        return self.file_hash
+
+    def get_statistics(self) -> dict:
+        """Basic facts about the run, computed on first use."""
+        if self.statistics is None:
+            self.update_statistics()
+        return self.statistics
+
+    def update_statistics(self) -> dict:
+        """Compute and store basic facts about the run."""
+        df = self.dataframe
+        docs_per_query = df.groupby("query_code").size()
+        self.statistics = {
+            "number_of_lines": len(df),
+            "number_of_queries": len(docs_per_query),
+            "min_docs_per_query": int(docs_per_query.min()),
+            "mean_docs_per_query": float(docs_per_query.mean()),
+            "max_docs_per_query": int(docs_per_query.max()),
+            "rank_depth": int(df["rank"].max()),
+            "min_score": float(df["score"].min()),
+            "max_score": float(df["score"].max()),
+            "duplicate_docs": int(df.duplicated(["query_code", "doc_code"]).sum()),
+        }
+        self.save(update_fields=["statistics"])
+        return self.statistics
 
 
 class MeasureValue(models.Model):
@@ -104,3 +308,12 @@ class MeasureValue(models.Model):
     )
     measure_name = models.CharField(max_length=100)
     value = models.FloatField()
+
+
+class PerQueryMeasureValue(models.Model):
+    pk = models.CompositePrimaryKey("retrieval_run", "measure_name")
+    retrieval_run = models.ForeignKey(
+        RetrievalRun, on_delete=models.CASCADE, related_name="per_query_measures"
+    )
+    measure_name = models.CharField(max_length=100)
+    values = models.JSONField()
@@ -1,19 +1,29 @@
-from celery import shared_task
+from celery import chord, shared_task
+from celery.signals import worker_process_shutdown
+from celery.utils.log import get_task_logger
+from django.contrib.staticfiles import finders
 from django.shortcuts import get_list_or_404, get_object_or_404
 from django.contrib.auth import get_user_model
 from django.template.loader import render_to_string
+from django.urls import reverse
 from django.core.files.base import ContentFile
-from playwright.sync_api import sync_playwright
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-import plotly.io as pio
 
 from .models import Report, AnalysisResult, RetrievalTask, RetrievalRun
 from .lib.utils import create_analysis
-import base64
+from .lib.report_context import ReportContext
+from .lib.frame_cache import frame_cache
+from .lib.browser_pool import browser_pool
+from .lib.plot_images import rasterize
+from .lib.results import decode_plot
+from .lib.interfaces import Analysis
+from functools import cache
+import hashlib
 import json
 
 User = get_user_model()
+logger = get_task_logger(__name__)
 
 
 @shared_task
@@ -22,64 +32,192 @@ def create_report(
     retrieval_task_id: str,
     retrieval_run_ids: list[str],
     parameters: dict[str, dict],
+):
+    retrieval_runs = get_list_or_404(RetrievalRun, pk__in=retrieval_run_ids)
+    report = get_object_or_404(Report, pk=report_id)
+    report.retrieval_runs.set(retrieval_runs)
+
+    chord(
+        run_analysis.s(
+            report_id=report_id,
+            retrieval_task_id=retrieval_task_id,
+            retrieval_run_ids=retrieval_run_ids,
+            analysis_name=analysis_name,
+            analysis_parameters=analysis_parameters,
+            position=i,
+            total=len(parameters),
+        )
+        for i, (analysis_name, analysis_parameters) in enumerate(parameters.items())
+    )(complete_report.s(report_id=report_id, total=len(parameters)))
+
+    return "Dispatched"
+
+
+@shared_task
+def run_analysis(
+    report_id: str,
+    retrieval_task_id: str,
+    retrieval_run_ids: list[str],
+    analysis_name: str,
+    analysis_parameters: dict,
+    position: int,
+    total: int,
 ):
     channel_layer = get_channel_layer()
 
     retrieval_task = get_object_or_404(RetrievalTask, pk=retrieval_task_id)
     retrieval_runs = get_list_or_404(RetrievalRun, pk__in=retrieval_run_ids)
+    # Runs are presented, and keyed, in the order they were selected in.
+    retrieval_runs.sort(key=lambda run: retrieval_run_ids.index(str(run.id)))
     report = get_object_or_404(Report, pk=report_id)
-    report.retrieval_runs.set(retrieval_runs)
 
-    for i, (analysis_name, analysis_parameters) in enumerate(parameters.items()):
-        analysis = create_analysis(analysis_name)
+    analysis = create_analysis(analysis_name)
+    cache_key = _analysis_cache_key(
+        analysis, analysis_name, analysis_parameters, retrieval_task, retrieval_runs
+    )
+    result = (
+        AnalysisResult.objects.filter(cache_key=cache_key)
+        .values_list("result", flat=True)
+        .first()
+    )
+    if result is None:
+        context = ReportContext(retrieval_task, retrieval_runs)
+        result = analysis.execute(context, **analysis_parameters).serialize()
+    else:
+        logger.info("Reusing the %s result %s", analysis_name, cache_key)
 
-        result = analysis.execute(
-            retrieval_task=retrieval_task,
-            retrieval_runs=retrieval_runs,
-            **analysis_parameters,
-        )
+    analysis_result = AnalysisResult.objects.create(
+        report=report,
+        analysis_type=analysis_name,
+        parameters=analysis_parameters,
+        position=position,
+        result=result,
+        cache_key=cache_key,
+    )
+
+    async_to_sync(channel_layer.group_send)(
+        f"report.{report_id}",
+        {
+            "type": "analysis_complete",
+            "progress": report.results.count(),
+            "total": total,
+            "result_id": str(analysis_result.id),
+            "analysis_name": analysis_result.analysis_display_name,
+            "position": position,
+            "url": reverse(
+                "view_analysis_result", args=[report_id, analysis_result.id]
+            ),
+        },
+    )
+
+    logger.info("Frame cache: %s", frame_cache.stats())
+
+    return analysis_name
 
-        AnalysisResult.objects.create(
-            report=report,
-            analysis_type=analysis_name,
-            parameters=analysis_parameters,
-            result=result.serialize(),
-        )
 
-        async_to_sync(channel_layer.group_send)(
-            f"report.{report_id}",
-            {
-                "type": "analysis_complete",
-                "progress": i + 1,
-                "total": len(parameters),
+def _analysis_cache_key(
+    analysis: Analysis,
+    analysis_name: str,
+    analysis_parameters: dict,
+    retrieval_task: RetrievalTask,
+    retrieval_runs: list[RetrievalRun],
+) -> str:
+    """
+    Hash identifying an analysis result by the content it was computed from.
+
+    Runs are identified by the hashes of their files and, since results
+    display them, by their titles, in the order the analysis receives
+    them. Parameters referring to a run by id refer
+    to it by the hash of its file instead.
+    """
+    run_hashes = {
+        str(retrieval_run.id): retrieval_run.get_file_hash()
+        for retrieval_run in retrieval_runs
+    }
+    content = json.dumps(
+        {
+            "analysis": analysis_name,
+            "version": analysis.version,
+            "parameters": {
+                name: run_hashes.get(value, value) if isinstance(value, str) else value
+                for name, value in analysis_parameters.items()
             },
-        )
+            "qrels": retrieval_task.get_qrels_hash(),
+            "runs": [
+                (retrieval_run.title, run_hashes[str(retrieval_run.id)])
+                for retrieval_run in retrieval_runs
+            ],
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+@shared_task
+def complete_report(analysis_names: list[str], report_id: str, total: int):
+    channel_layer = get_channel_layer()
 
     async_to_sync(channel_layer.group_send)(
         f"report.{report_id}",
         {
             "type": "report_complete",
-            "total": len(parameters),
+            "total": total,
         },
     )
 
     return "Completed"
 
 
+@shared_task
+def ingest_retrieval_task(retrieval_task_id: str):
+    retrieval_task = get_object_or_404(RetrievalTask, pk=retrieval_task_id)
+    retrieval_task.update_qrels_metadata()
+    retrieval_task.get_qrels_hash()
+
+    return "Ingested"
+
+
+@shared_task
+def ingest_retrieval_run(retrieval_run_id: str):
+    retrieval_run = get_object_or_404(RetrievalRun, pk=retrieval_run_id)
+    retrieval_run.update_statistics()
+    retrieval_run.get_file_hash()
+
+    return "Ingested"
+
+
+@cache
+def _stylesheet() -> bytes:
+    with open(finders.find("css/output.css"), "rb") as f:
+        return f.read()
+
+
+@worker_process_shutdown.connect
+def _close_browser_pool(**kwargs):
+    browser_pool.close()
+
+
 @shared_task
 def generate_pdf(report_id: str):
     channel_layer = get_channel_layer()
 
     report = get_object_or_404(Report, pk=report_id)
+    assets = {"static/css/output.css": (_stylesheet(), "text/css")}
+
+    plots = []
+
+    def plot_asset(plot: dict) -> str:
+        plots.append(plot)
+        return f"plots/{len(plots)}.png"
+
     data = []
     for result in report.results.all():
         if result.result["type"] == "plot":
-            fig = pio.from_json(json.dumps(result.result["value"]))
-            img = pio.to_image(fig, format="png", width=800, height=400)
             data.append(
                 {
                     "type": result.result["type"],
-                    "value": f"data:image/png;base64,{base64.b64encode(img).decode()}",
+                    "value": plot_asset(decode_plot(result.result)),
                     "analysis_type": result.analysis_display_name,
                 }
             )
@@ -87,13 +225,9 @@ def generate_pdf(report_id: str):
             subdata = {}
             for label, sub_result in result.result["value"]:
                 if sub_result["type"] == "plot":
-                    fig = pio.from_json(json.dumps(sub_result["value"]))
-                    img = pio.to_image(fig, format="png", width=800, height=400)
                     subdata[label] = {
                         "type": sub_result["type"],
-                        "value": (
-                            f"data:image/png;base64,{base64.b64encode(img).decode()}"
-                        ),
+                        "value": plot_asset(decode_plot(sub_result)),
                     }
                 else:
                     subdata[label] = {
@@ -116,8 +250,8 @@ def generate_pdf(report_id: str):
                 }
             )
 
-    with open("/app/src/aspire_v2/static/css/output.css", "r") as f:
-        css_content = f.read()
+    for i, image in enumerate(rasterize(plots), 1):
+        assets[f"plots/{i}.png"] = (image, "image/png")
 
     report_html = render_to_string(
         "core/report_pdf.html",
@@ -126,17 +260,9 @@ def generate_pdf(report_id: str):
             "description": report.description,
             "date": report.date,
             "data": data,
-            "css_content": css_content,
         },
     )
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-        page.set_content(report_html)
-        page.wait_for_timeout(2000)
-        pdf_bytes = page.pdf(format="A4", print_background=True)
-        browser.close()
+    pdf_bytes = browser_pool.render_pdf(report_html, assets)
 
     report.pdf.save(f"report_{report_id}.pdf", ContentFile(pdf_bytes), save=True)
 
@@ -1,3 +1,72 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .lib.results import PlotResult, decode_plot
+from .lib.trec import read_qrels, read_run
+import numpy as np
+import plotly.graph_objects as go
+import base64
+import io
+import json
+
+
+class TrecParserTests(SimpleTestCase):
+    def test_trailing_separator_is_rejected(self):
+        for data in [b"1 0 d1 \n", b"1\t0\td1\t\n"]:
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                read_qrels(io.BytesIO(data))
+
+        with self.assertRaises(ValueError):
+            read_run(io.BytesIO(b"q1\tQ0\td1\t1\t\tt\n"))
+
+    def test_whitespace_only_lines_are_skipped(self):
+        for data in [
+            b"q1 Q0 d1 1 2.5 t\n     \nq1 Q0 d2 2 1.5 t\n",
+            b"q1\tQ0\td1\t1\t2.5\tt\n \t \nq1\tQ0\td2\t2\t1.5\tt\n",
+        ]:
+            with self.subTest(data=data):
+                df = read_run(io.BytesIO(data))
+                self.assertEqual(df["doc_id"].tolist(), ["d1", "d2"])
+                self.assertEqual(df["rank"].tolist(), [1, 2])
+
+
+def _decode_arrays(value):
+    if isinstance(value, dict):
+        if "bdata" in value:
+            array = np.frombuffer(base64.b64decode(value["bdata"]), value["dtype"])
+            if "shape" in value:
+                array = array.reshape([int(n) for n in value["shape"].split(",")])
+            return array.tolist()
+        return {key: _decode_arrays(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode_arrays(item) for item in value]
+    return value
+
+
+class PlotResultTests(SimpleTestCase):
+    def assertRoundTrip(self, figure: go.Figure, **expected):
+        serialized = PlotResult(figure).serialize()
+        for key, value in expected.items():
+            self.assertEqual(serialized.get(key), value)
+        self.assertEqual(
+            _decode_arrays(decode_plot(json.loads(json.dumps(serialized)))),
+            _decode_arrays(json.loads(figure.to_json())),
+        )
+        return serialized
+
+    def test_typed_arrays(self):
+        rng = np.random.default_rng(0)
+        figure = go.Figure(
+            [
+                go.Bar(x=["a", "b", "c"], y=[1, 2, 3]),
+                go.Scatter(x=rng.normal(size=50), y=rng.integers(-40000, 40000, 50)),
+                go.Heatmap(z=rng.integers(0, 2**40, (3, 4))),
+                go.Heatmap(z=[[1.5, None], [2.5, 3.5]]),
+            ]
+        )
+        serialized = self.assertRoundTrip(figure)
+        # Plain lists are encoded too, as the smallest type that fits.
+        self.assertEqual(serialized["value"]["data"][0]["y"]["dtype"], "i1")
+
+    def test_large_figure_is_compressed(self):
+        figure = go.Figure(go.Bar(x=[f"doc {i}" for i in range(10000)], y=[1] * 10000))
+        self.assertRoundTrip(figure, encoding="gzip")
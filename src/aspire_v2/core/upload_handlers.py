@@ -0,0 +1,40 @@
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+import hashlib
+
+
+class SHA256Mixin:
+    """
+    Hash uploads while they are received.
+
+    The hex digest is available as the sha256 attribute of the uploaded
+    file, so it never has to be read again to be identified.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        remaining = super().receive_data_chunk(raw_data, start)
+        # Only the handler that keeps the data hashes it.
+        if remaining is None:
+            self.sha256.update(raw_data)
+        return remaining
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class SHA256MemoryFileUploadHandler(SHA256Mixin, MemoryFileUploadHandler):
+    pass
+
+
+class SHA256TemporaryFileUploadHandler(SHA256Mixin, TemporaryFileUploadHandler):
+    pass
@@ -2,6 +2,7 @@ from django.urls import path
 
 from .views import (
     view_report,
+    view_analysis_result,
     ReportListView,
     new_report_general,
     new_report_runs,
@@ -10,6 +11,8 @@ from .views import (
     report_status,
     # generate_pdf_view,
     download_pdf,
+    download_qrels,
+    download_retrieval_run,
     ReportDeleteView,
     RetrievalTaskListView,
     RetrievalTaskDetailView,
@@ -29,6 +32,11 @@ urlpatterns = [
     path("new_report_parameters", new_report_parameters, name="new_report_parameters"),
     path("new_report_cancel", new_report_cancel, name="new_report_cancel"),
     path("view_report/<uuid:report_id>", view_report, name="view_report"),
+    path(
+        "view_report/<uuid:report_id>/results/<uuid:result_id>",
+        view_analysis_result,
+        name="view_analysis_result",
+    ),
     path("report_status/<uuid:report_id>", report_status, name="report_status"),
     path("confirm_delete/<uuid:pk>", ReportDeleteView.as_view(), name="report_delete"),
     # path("view_report/<uuid:report_id>/pdf", generate_pdf_view, name="generate_pdf"),
@@ -39,6 +47,7 @@ urlpatterns = [
         RetrievalTaskDetailView.as_view(),
         name="retrieval_task_detail",
     ),
+    path("tasks/<uuid:pk>/qrels", download_qrels, name="download_qrels"),
     path(
         "tasks/upload", RetrievalTaskUploadView.as_view(), name="retrieval_task_upload"
     ),
@@ -53,6 +62,7 @@ urlpatterns = [
         RetrievalRunDetailView.as_view(),
         name="retrieval_run_detail",
     ),
+    path("runs/<uuid:pk>/file", download_retrieval_run, name="download_retrieval_run"),
     path("runs/upload", RetrievalRunUploadView.as_view(), name="retrieval_run_upload"),
     path(
         "runs/confirm_delete/<uuid:pk>",
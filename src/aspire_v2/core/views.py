@@ -5,10 +5,20 @@ from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
-from django.http import FileResponse
-
-from .tasks import create_report, generate_pdf
-from .models import Report, RetrievalRun, RetrievalTask
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.utils.http import content_disposition_header
+from storages.backends.s3 import S3Storage
+
+from .tasks import (
+    create_report,
+    generate_pdf,
+    ingest_retrieval_run,
+    ingest_retrieval_task,
+)
+from .models import AnalysisResult, Report, RetrievalRun, RetrievalTask
 from .forms import (
     RetrievalTaskUploadForm,
     RetrievalRunUploadForm,
@@ -17,6 +27,10 @@ from .forms import (
 )
 
 from .lib.reports import all_reports
+from .lib.results import plot_template
+
+from functools import cache
+from urllib.parse import urlsplit
 
 
 class ReportListView(LoginRequiredMixin, ListView):
@@ -162,45 +176,67 @@ def report_status(request, report_id):
     return render(
         request,
         "core/report_status.html",
-        {"report": report},
+        {"report": report, "results": report.results.defer("result")},
     )
 
 
 @login_required
 def view_report(request, report_id: str):
     report = get_object_or_404(Report, pk=report_id)
-    plot_data = {}
-    for result in report.results.all():
-        data = result.result
-        if data["type"] == "plot":
-            plot_data[result.analysis_type] = data
-        elif data["type"] == "composite":
-            for label, sub_result in data["value"]:
-                if sub_result["type"] == "plot":
-                    plot_data[f"{result.analysis_type}-{label}"] = sub_result
+    pdf_is_generating = False
     if request.method == "POST" and not report.pdf:
         generate_pdf.delay(report_id)
-        return render(
-            request,
-            "core/report.html",
-            {
-                "report": report,
-                "plot_data": plot_data,
-                "pdf_is_generating": True,
-            },
-        )
+        pdf_is_generating = True
 
     return render(
         request,
         "core/report.html",
         {
             "report": report,
-            "plot_data": plot_data,
-            "pdf_is_generating": False,
+            "results": report.results.defer("result"),
+            "pdf_is_generating": pdf_is_generating,
         },
     )
 
 
+def _plot_data(analysis_result: AnalysisResult) -> dict[str, dict]:
+    """Plots of a result, keyed by the ids of their containers."""
+    data = analysis_result.result
+    if data["type"] == "plot":
+        return {str(analysis_result.id): data}
+    if data["type"] == "composite":
+        return {
+            f"{analysis_result.id}-{i}": sub_result
+            for i, (_, sub_result) in enumerate(data["value"], 1)
+            if sub_result["type"] == "plot"
+        }
+    return {}
+
+
+@login_required
+def view_analysis_result(request, report_id: str, result_id: str):
+    analysis_result = get_object_or_404(
+        AnalysisResult, pk=result_id, report_id=report_id
+    )
+    plots = _plot_data(analysis_result)
+
+    return JsonResponse(
+        {
+            "html": render_to_string(
+                "core/analysis_result.html",
+                {"analysis_result": analysis_result},
+                request,
+            ),
+            "plots": plots,
+            "plot_templates": {
+                plot["template"]: plot_template(plot["template"])
+                for plot in plots.values()
+                if "template" in plot
+            },
+        }
+    )
+
+
 # def generate_pdf_view(request, report_id: str):
 #     if request.method == "POST":
 #         generate_pdf.delay(report_id)
@@ -209,18 +245,72 @@ def view_report(request, report_id: str):
 #         )
 
 
+@cache
+def _public_storage() -> S3Storage:
+    return S3Storage(
+        **{
+            **settings.STORAGES["default"]["OPTIONS"],
+            "endpoint_url": settings.S3_PUBLIC_ENDPOINT_URL,
+        }
+    )
+
+
+def _file_download(file: FieldFile, filename: str, content_type: str):
+    """Send a stored file according to FILE_DOWNLOAD_MODE."""
+    if settings.FILE_DOWNLOAD_MODE == "proxy":
+        return FileResponse(
+            file.open("rb"),
+            content_type=content_type,
+            as_attachment=True,
+            filename=filename,
+        )
+
+    # Storage sets the headers of the download itself.
+    parameters = {
+        "ResponseContentDisposition": content_disposition_header(True, filename),
+        "ResponseContentType": content_type,
+    }
+    if settings.FILE_DOWNLOAD_MODE == "presigned":
+        return redirect(
+            _public_storage().url(
+                file.name, parameters, expire=settings.FILE_DOWNLOAD_URL_EXPIRY
+            )
+        )
+
+    # nginx fetches the presigned URL from the internal endpoint.
+    url = urlsplit(
+        file.storage.url(
+            file.name, parameters, expire=settings.FILE_DOWNLOAD_URL_EXPIRY
+        )
+    )
+    response = HttpResponse(content_type=content_type)
+    response["X-Accel-Redirect"] = f"/internal-storage{url.path}?{url.query}"
+    return response
+
+
 @login_required
 def download_pdf(request, report_id: str):
     report = get_object_or_404(Report, pk=report_id)
 
-    response = FileResponse(
-        report.pdf.open("rb"),
-        content_type="application/pdf",
-        as_attachment=True,
-        filename=f"{report.title}.pdf",
+    return _file_download(report.pdf, f"{report.title}.pdf", "application/pdf")
+
+
+@login_required
+def download_qrels(request, pk: str):
+    retrieval_task = get_object_or_404(RetrievalTask, pk=pk)
+
+    return _file_download(
+        retrieval_task.qrels, f"{retrieval_task.title}.qrels", "text/plain"
     )
 
-    return response
+
+@login_required
+def download_retrieval_run(request, pk: str):
+    retrieval_run = get_object_or_404(RetrievalRun, pk=pk)
+
+    return _file_download(
+        retrieval_run.file, f"{retrieval_run.title}.run", "text/plain"
+    )
 
 
 class RetrievalTaskListView(LoginRequiredMixin, ListView):
@@ -247,7 +337,10 @@ class RetrievalTaskUploadView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        self.object.build_qrels_artifact(form.qrels_dataframe)
+        ingest_retrieval_task.delay_on_commit(str(self.object.id))
+        return response
 
 
 class RetrievalTaskDeleteView(LoginRequiredMixin, DeleteView):
@@ -286,6 +379,12 @@ class RetrievalRunUploadView(LoginRequiredMixin, CreateView):
         kwargs["user"] = self.request.user
         return kwargs
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        self.object.build_artifact(form.dataframe)
+        ingest_retrieval_run.delay_on_commit(str(self.object.id))
+        return response
+
 
 class RetrievalRunDeleteView(LoginRequiredMixin, DeleteView):
     model = RetrievalRun